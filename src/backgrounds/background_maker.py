@@ -1,12 +1,30 @@
 """Para manipular las imágenes"""
-from itertools import product
-from typing import Iterable
+from dataclasses import dataclass
+from functools import cache, lru_cache
+from typing import Iterable, Literal
 
 import cv2 as cv
 import numpy as np
 
 Pixel = Iterable[int]
 Image = np.ndarray
+Pattern = Literal["grid", "dots", "none"]
+
+# Entradas de los cachés de patrones y de viñetas, las menos usadas se borran
+PATTERN_CACHE_SIZE = 32
+VIGNETTE_CACHE_SIZE = 4
+OVERLAY_CACHE_SIZE = 16
+
+# Tipo de OpenCV de cada tipo de numpy de las imágenes
+CV_DEPTHS = {
+    "uint8": cv.CV_8U,
+    "int8": cv.CV_8S,
+    "uint16": cv.CV_16U,
+    "int16": cv.CV_16S,
+    "int32": cv.CV_32S,
+    "float32": cv.CV_32F,
+    "float64": cv.CV_64F,
+}
 
 
 def drawn_background(color: Pixel, size: Iterable[int] = (1920, 1080)) -> Image:
@@ -48,25 +66,67 @@ def drawn_grid(img: Image, color: Pixel, gap: int = 30, thickness: int = 1) -> I
     -------
     Image
         Imagen con la rejilla de lineas
+
+    Notes
+    -----
+    Cada linea cubre las mismas filas o columnas que `cv.line`, así que en vez
+    de dibujarlas una por una se asignan con una vista con paso `gap` por cada
+    fila del grueso de la linea, en O(filas + columnas).
     """
     height, width, _ = img.shape
-    for row, column in product(range(0, height, gap), range(0, width, gap)):
-        # Lineas horizontales
-        cv.line(img, (0, row), (width, row), color=color, thickness=thickness)
-        # Lineas verticales
-        cv.line(img, (column, 0), (column, height), color=color, thickness=thickness)
-
-    # Última linea horizontal inferior
-    cv.line(
-        img, (0, height - 1), (width - 1, height - 1), color=color, thickness=thickness
-    )
-    # Última linea vertical derecha
-    cv.line(
-        img, (width - 1, 0), (width - 1, height - 1), color=color, thickness=thickness
-    )
+    offsets = _line_offsets(thickness)
+    # Una fila de la linea se copia entera en todas las filas horizontales
+    line = np.empty_like(img[0])
+    line[:] = color
+    for rows in _line_slices(height, gap, offsets):
+        img[rows] = line
+    pixels, pixel = _as_pixels(img, color)
+    for columns in _line_slices(width, gap, offsets):
+        pixels[:, columns] = pixel
     return img
 
 
+@cache
+def _line_offsets(thickness: int) -> np.ndarray:
+    """
+    Desplazamientos de las filas que cubre una linea horizontal de `cv.line`.
+    """
+    margin = thickness + 2
+    stamp = np.zeros((2 * margin + 1, 2 * margin + 1), dtype="uint8")
+    cv.line(stamp, (0, margin), (2 * margin, margin), color=255, thickness=thickness)
+    return np.flatnonzero(stamp[:, margin]) - margin
+
+
+def _as_pixels(img: Image, color: Pixel) -> tuple[np.ndarray, np.void]:
+    """
+    Vista de la imagen con un elemento por pixel, y el color como uno de ellos.
+
+    Asignar un pixel de una vez es mucho más rápido que asignar sus canales en
+    las vistas que no son contiguas, como las columnas.
+    """
+    pixel_type = np.dtype((np.void, img.dtype.itemsize * img.shape[2]))
+    pixel = np.array(color, dtype=img.dtype).view(pixel_type)[0]
+    return img.view(pixel_type)[..., 0], pixel
+
+
+def _line_slices(length: int, gap: int, offsets: np.ndarray) -> list[slice]:
+    """
+    Vistas de las filas (o columnas) que cubren las lineas de la rejilla, cada
+    `gap` pixeles desde 0, y la última linea en `length - 1`.
+    """
+    last = (length - 1) // gap * gap
+    slices = []
+    for offset in offsets:
+        # La primera linea que cae dentro de la imagen con este desplazamiento
+        first = 0 if offset >= 0 else -(offset // gap) * gap
+        start, stop = first + offset, min(length, last + offset + 1)
+        if 0 <= start < stop:
+            slices.append(slice(start, stop, gap))
+        if 0 <= length - 1 + offset < length:
+            slices.append(slice(length - 1 + offset, length + offset))
+    return slices
+
+
 def drawn_dots(img: Image, color: Pixel, gap: int = 30, radius: int = 1) -> Image:
     """
     Dibuja una rejilla de puntos en una imagen
@@ -86,15 +146,148 @@ def drawn_dots(img: Image, color: Pixel, gap: int = 30, radius: int = 1) -> Imag
     -------
     Image
         Imagen con la rejilla de puntos
+
+    Notes
+    -----
+    Se dibuja un solo punto con `cv.circle` y cada uno de sus pixeles se asigna
+    a la vez en todos los puntos de la rejilla.
     """
     height, width, _ = img.shape
-    for row, column in product(range(gap, height, gap), range(gap, width, gap)):
-        cv.circle(
-            img, center=(column, row), radius=radius, color=color, thickness=cv.FILLED
-        )
+    pixels, pixel = _as_pixels(img, color)
+    for offset_y, offset_x in _dot_offsets(radius):
+        rows = _dot_slice(height, gap, offset_y)
+        columns = _dot_slice(width, gap, offset_x)
+        if rows is not None and columns is not None:
+            pixels[rows, columns] = pixel
     return img
 
 
+def _dot_slice(length: int, gap: int, offset: int) -> slice | None:
+    """
+    Vista de los pixeles a `offset` de los centros de los puntos, cada `gap`
+    pixeles desde `gap`, o None si ninguno cae dentro de la imagen.
+    """
+    last = (length - 1) // gap * gap
+    # El primer centro cuyo pixel cae dentro de la imagen
+    first = max(gap, -(offset // gap) * gap)
+    start, stop = first + offset, min(length, last + offset + 1)
+    return slice(start, stop, gap) if 0 <= start < stop else None
+
+
+@cache
+def _dot_offsets(radius: int) -> list[tuple[int, int]]:
+    """
+    Desplazamientos desde el centro de los pixeles de un punto de `cv.circle`.
+    """
+    margin = radius + 2
+    stamp = np.zeros((2 * margin + 1, 2 * margin + 1), dtype="uint8")
+    cv.circle(
+        stamp, center=(margin, margin), radius=radius, color=255, thickness=cv.FILLED
+    )
+    return [(row - margin, column - margin) for row, column in np.argwhere(stamp)]
+
+
+def drawn_pattern(
+    background: Pixel,
+    color: Pixel,
+    size: Iterable[int] = (1920, 1080),
+    pattern: Pattern = "grid",
+    gap: int = 30,
+    thickness: int = 1,
+    rows: slice = slice(None),
+) -> Image:
+    """
+    Crea una imagen RGB de un color con una rejilla de lineas o de puntos.
+
+    Es lo mismo que `drawn_grid` o `drawn_dots` sobre `drawn_background`, pero
+    las filas distintas de la imagen se guardan en un caché, así que volver a
+    crear el mismo patrón, o solo una franja de él, solo cuesta copiarlas.
+
+    Parameters
+    ----------
+    background : Pixel
+        Color del fondo en RGB
+    color : Pixel
+        Color del patrón en RGB
+    size : Iterable[int], optional
+        Tamaño de la imagen, by default (1920, 1080)
+    pattern : Pattern, optional
+        Rejilla de lineas, de puntos o ninguna, by default "grid"
+    gap : int, optional
+        Espacio entre las lineas o los puntos, by default 30
+    thickness : int, optional
+        Grueso de las lineas o radio de los puntos, by default 1
+    rows : slice, optional
+        Franja de filas de la imagen que se crea, by default todas
+
+    Returns
+    -------
+    Image
+        Imagen RGB con el patrón
+    """
+    width, height = size
+    templates, kinds = _pattern_tiles(
+        tuple(background), tuple(color), width, height, pattern, gap, thickness
+    )
+    return templates[kinds[rows]]
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _pattern_tiles(
+    background: tuple[int, ...],
+    color: tuple[int, ...],
+    width: int,
+    height: int,
+    pattern: Pattern,
+    gap: int,
+    thickness: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Las filas distintas de un patrón y cuál de ellas va en cada fila de la
+    imagen.
+
+    Una rejilla solo tiene filas del fondo con las columnas de las lineas y
+    filas de linea, y una rejilla de puntos una fila por cada combinación de
+    filas del punto que caen en la misma fila de la imagen.
+    """
+    templates = np.empty((1, width, 3), dtype="uint8")
+    templates[:] = background
+    kinds = np.zeros(height, dtype=np.intp)
+    if pattern == "grid":
+        offsets = _line_offsets(thickness)
+        pixels, pixel = _as_pixels(templates, color)
+        for columns in _line_slices(width, gap, offsets):
+            pixels[:, columns] = pixel
+        line = np.empty_like(templates)
+        line[:] = color
+        templates = np.concatenate([templates, line])
+        for slice_y in _line_slices(height, gap, offsets):
+            kinds[slice_y] = 1
+    elif pattern == "dots":
+        dot_rows: dict[int, list[int]] = {}
+        for offset_y, offset_x in _dot_offsets(thickness):
+            dot_rows.setdefault(offset_y, []).append(offset_x)
+        # Qué filas del punto caen en cada fila, varias si los puntos se enciman
+        members = np.zeros((height, len(dot_rows)), dtype=bool)
+        for index, offset_y in enumerate(dot_rows):
+            if (slice_y := _dot_slice(height, gap, offset_y)) is not None:
+                members[slice_y, index] = True
+        combinations, kinds = np.unique(members, axis=0, return_inverse=True)
+        kinds = kinds.reshape(height)
+        templates = np.repeat(templates, len(combinations), axis=0)
+        pixels, pixel = _as_pixels(templates, color)
+        offsets_x = list(dot_rows.values())
+        for kind, combination in enumerate(combinations):
+            for index in np.flatnonzero(combination):
+                for offset_x in offsets_x[index]:
+                    if (columns := _dot_slice(width, gap, offset_x)) is not None:
+                        pixels[kind, columns] = pixel
+    # Se comparten entre llamadas, nadie debe cambiarlas
+    templates.flags.writeable = False
+    kinds.flags.writeable = False
+    return templates, kinds
+
+
 def change_size(img: Image, rate: float) -> Image:
     """
     Cambia el tamaño de una imagen con un factor de proporción
@@ -118,6 +311,149 @@ def change_size(img: Image, rate: float) -> Image:
     return cv.resize(img, (width, height), interpolation=cv.INTER_AREA)
 
 
+@dataclass(frozen=True)
+class Overlay:
+    """
+    Imagen BGR con transparencia, lista para componerse sobre otras.
+
+    El color se guarda multiplicado por la transparencia, así que poner la
+    imagen solo cuesta `fondo * (255 - alpha) / 255 + color`.
+
+    Attributes
+    ----------
+    color : Image
+        Color BGR multiplicado por alpha / 255
+    inverse_alpha : Image
+        255 - alpha, repetido en los tres canales
+    """
+
+    color: Image
+    inverse_alpha: Image
+
+    @classmethod
+    def from_image(
+        cls, image: Image, rate: float = 1.0, threshold: int = 10
+    ) -> "Overlay":
+        """
+        Prepara una imagen BGR o BGRA para componerla.
+
+        Parameters
+        ----------
+        image : Image
+            Imagen BGRA, o BGR cuyos pixeles oscuros son transparentes
+        rate : float, optional
+            Factor de cambio de tamaño, by default 1.0
+        threshold : int, optional
+            Gris hasta el que un pixel BGR es transparente, by default 10
+
+        Returns
+        -------
+        Overlay
+            La imagen premultiplicada
+        """
+        if image.shape[2] == 3:
+            # Sin canal alpha, como `join_images`: opacos los pixeles claros
+            if rate != 1.0:
+                image = change_size(image, rate)
+            gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+            _, alpha = cv.threshold(gray, threshold, 255, cv.THRESH_BINARY)
+            color = cv.bitwise_and(image, image, mask=alpha)
+        else:
+            alpha = cv.merge([image[:, :, 3]] * 3)
+            color = cv.multiply(image[:, :, :3], alpha, scale=1 / 255)
+            # Se redimensiona ya premultiplicada, para que los bordes no se
+            # manchen del color de los pixeles transparentes
+            if rate != 1.0:
+                color = change_size(color, rate)
+                alpha = change_size(alpha, rate)[:, :, 0]
+            else:
+                alpha = alpha[:, :, 0]
+        inverse_alpha = cv.merge([cv.bitwise_not(alpha)] * 3)
+        color.flags.writeable = False
+        inverse_alpha.flags.writeable = False
+        return cls(color, inverse_alpha)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Alto y ancho de la imagen."""
+        height, width, _ = self.color.shape
+        return height, width
+
+
+@lru_cache(maxsize=OVERLAY_CACHE_SIZE)
+def load_overlay(path: str, rate: float = 1.0) -> Overlay:
+    """
+    Lee una imagen con su canal alpha y la prepara para componerla, una sola
+    vez por archivo y tamaño.
+
+    Parameters
+    ----------
+    path : str
+        Archivo de la imagen
+    rate : float, optional
+        Factor de cambio de tamaño, by default 1.0
+
+    Returns
+    -------
+    Overlay
+        La imagen premultiplicada
+
+    Raises
+    ------
+    FileNotFoundError
+        Si no se puede leer la imagen.
+    """
+    image = cv.imread(path, cv.IMREAD_UNCHANGED)
+    if image is None:
+        raise FileNotFoundError(f"No se puede leer la imagen {path}")
+    if image.ndim == 2:
+        image = cv.cvtColor(image, cv.COLOR_GRAY2BGR)
+    return Overlay.from_image(image, rate)
+
+
+def composite(
+    canvas: Image, overlays: Iterable[tuple[Overlay, Iterable[int]]]
+) -> Image:
+    """
+    Pone varias imágenes sobre otra, en su lugar.
+
+    Parameters
+    ----------
+    canvas : Image
+        Imagen BGR uint8 sobre la que se ponen, se modifica
+    overlays : Iterable[tuple[Overlay, Iterable[int]]]
+        Cada imagen con las coordenadas (x, y) de su esquina superior
+        izquierda, que pueden quedar en parte fuera de `canvas`
+
+    Returns
+    -------
+    Image
+        `canvas` con las imágenes puestas en orden
+
+    Notes
+    -----
+    Solo se toca la parte de `canvas` que cubre cada imagen, en una vista y
+    sin copias del tamaño de `canvas`.
+    """
+    canvas_height, canvas_width, _ = canvas.shape
+    for overlay, (x_coord, y_coord) in overlays:
+        height, width = overlay.shape
+        # La parte de la imagen que cae dentro de canvas
+        left, top = max(x_coord, 0), max(y_coord, 0)
+        right = min(x_coord + width, canvas_width)
+        bottom = min(y_coord + height, canvas_height)
+        if left >= right or top >= bottom:
+            continue
+        region = canvas[top:bottom, left:right]
+        crop = (
+            slice(top - y_coord, bottom - y_coord),
+            slice(left - x_coord, right - x_coord),
+        )
+        cv.multiply(region, overlay.inverse_alpha[crop], dst=region, scale=1 / 255)
+        cv.add(region, overlay.color[crop], dst=region)
+    return canvas
+
+
 def join_images(
     foreground: Image, background: Image, coordinates: Iterable[int]
 ) -> Image:
@@ -127,7 +463,8 @@ def join_images(
     Parameters
     ----------
     foreground : Image
-        La imagen que se va a unir
+        La imagen que se va a unir, BGRA o BGR con los pixeles oscuros
+        transparentes
     background : Image
         Segundo plano que se va a unir
     coordinates : Iterable[int]
@@ -138,35 +475,12 @@ def join_images(
     Image
         Imagen con las figuras unidas
     """
-    # Quiero colocar el logo en las coordenadas (x, y), así que
-    # creo zoom_fondo_segundo_plano
-    x_coord, y_coord = coordinates
-    alto, ancho, _ = foreground.shape
-    background_zoomed = background[y_coord : y_coord + alto, x_coord : x_coord + ancho]
-
-    # Ahora creo una máscara del primer plano y su máscara inversa también.
-    foreground_gray = cv.cvtColor(foreground, cv.COLOR_BGR2GRAY)
-    _, mask = cv.threshold(foreground_gray, 10, 255, cv.THRESH_BINARY)
-    # mascara = cv.erode(mascara, None)
-    # kernel = cv.getStructuringElement(cv.MORPH_RECT, (3, 3))
-    # mascara = cv.morphologyEx(mascara, cv.MORPH_OPEN, kernel)
-    mask_inv = cv.bitwise_not(mask)
-
-    # Deja en negro (0, 0, 0) el area del logo en zoom_fondo_segundo_plano
-    background_cropped_zoomed = cv.bitwise_and(
-        background_zoomed, background_zoomed, mask=mask_inv
-    )
-
-    # Toma solo la región del logo en la imagen
-    foreground_cropped = cv.bitwise_and(foreground, foreground, mask=mask)
+    return composite(background, [(Overlay.from_image(foreground), coordinates)])
 
-    # Pon el logo en el zoom_fondo_segundo_plano y modifica la imagen del fondo
-    joined_zoomed = cv.add(background_cropped_zoomed, foreground_cropped)
-    background[y_coord : y_coord + alto, x_coord : x_coord + ancho] = joined_zoomed
-    return background
 
-
-def apply_vignette(img: Image, sigma: int = 200) -> Image:
+def apply_vignette(
+    img: Image, sigma: int = 200, top: int = 0, size: Iterable[int] | None = None
+) -> Image:
     """
     Aplicar una viñeta a una imagen
 
@@ -176,32 +490,92 @@ def apply_vignette(img: Image, sigma: int = 200) -> Image:
         La imagen a la que se le va a aplicar la viñeta
     sigma : int, optional
         Valor de la intensidad, by default 200
+    top : int, optional
+        Fila de la imagen completa donde empieza `img`, si es una franja de
+        ella, by default 0
+    size : Iterable[int] | None, optional
+        Tamaño de la imagen completa, by default el de `img`
 
     Returns
     -------
     Image
         Imagen con la viñeta
+
+    Notes
+    -----
+    La máscara se multiplica en todos los canales de una vez, y `cv.multiply`
+    redondea y satura el resultado al tipo de la imagen en vez de truncarlo.
+    La máscara de una imagen completa se guarda en un caché, la de una franja
+    se calcula con los kernels guardados.
     """
-    # Calcular el alto y ancho de la imagen
-    height, width, _ = img.shape
+    height, width, channels = img.shape
+    if size is None:
+        mask = vignette_mask(width, height, sigma, channels)
+    else:
+        width, full_height = size
+        mask = _vignette_rows(width, full_height, sigma, channels, top, top + height)
+    return cv.multiply(img, mask, dst=img, dtype=CV_DEPTHS[img.dtype.name])
+
+
+@lru_cache(maxsize=VIGNETTE_CACHE_SIZE)
+def vignette_mask(
+    width: int, height: int, sigma: int = 200, channels: int = 3
+) -> np.ndarray:
+    """
+    Máscara de la viñeta de una imagen, calculada una vez por tamaño y sigma.
 
+    Parameters
+    ----------
+    width : int
+        Ancho de la imagen
+    height : int
+        Alto de la imagen
+    sigma : int, optional
+        Valor de la intensidad, by default 200
+    channels : int, optional
+        Canales de la imagen, by default 3
+
+    Returns
+    -------
+    np.ndarray
+        Máscara float32 de solo lectura, de (height, width, channels)
+    """
+    mask = _vignette_rows(width, height, sigma, channels, 0, height)
+    # Se comparte entre llamadas, nadie debe cambiarla
+    mask.flags.writeable = False
+    return mask
+
+
+def _vignette_rows(
+    width: int, height: int, sigma: int, channels: int, top: int, bottom: int
+) -> np.ndarray:
+    """
+    Filas de `top` a `bottom` de la máscara de la viñeta, repetidas en cada
+    canal para multiplicarlas con la imagen de una vez.
+    """
+    y_kernel, x_kernel = _vignette_kernels(width, height, sigma)
+    # La matriz del kernel resultante, solo en las filas que se piden
+    mask = (y_kernel[top:bottom] * x_kernel).astype(np.float32)
+    return np.repeat(mask[:, :, np.newaxis], channels, axis=2)
+
+
+@lru_cache(maxsize=VIGNETTE_CACHE_SIZE)
+def _vignette_kernels(
+    width: int, height: int, sigma: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Kernels gaussianos de las columnas y de las filas de la viñeta, cuyo
+    producto es la máscara.
+    """
     # Genera una mascara de viñeta usando los
     # kernel gaussianos resultantes
     x_kernel = cv.getGaussianKernel(width, sigma)
     y_kernel = cv.getGaussianKernel(height, sigma)
 
-    # Generando la matriz del kernel resultante
-    kernel = y_kernel * x_kernel.T
-
-    # Creando una máscara y normalizándose usando una
-    # función de numpy
-    mask = 255 * kernel / np.linalg.norm(kernel)
-
-    # Aplicando la máscara a cada canal de la imagen
-    for i in range(3):
-        img[:, :, i] *= mask
-
-    return img
+    # La norma del producto es el producto de las normas, así que la
+    # máscara normalizada se puede calcular por filas
+    scale = 255 / (np.linalg.norm(y_kernel) * np.linalg.norm(x_kernel))
+    return y_kernel * scale, x_kernel.T
 
 
 def main() -> None:
@@ -221,11 +595,10 @@ def main() -> None:
     # Invertir colores del fondo
     # background = cv.bitwise_not(background)
 
-    logo = cv.imread("src/backgrounds/images/alpha.png")
-    # Cambiar tamaño de la imagen en primer plano
-    logo = change_size(logo, 0.12)
+    # Leer el logo con su transparencia y cambiarle el tamaño
+    logo = load_overlay("src/backgrounds/images/alpha.png", 0.12)
     # Poner el logo en el fondo
-    background = join_images(logo, background, (1830, 990))
+    background = composite(background, [(logo, (1830, 990))])
 
     # Guardarla
     # cv.imwrite('src/backgrounds/images/fondo_lineas_logo.png', background)
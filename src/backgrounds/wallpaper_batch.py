@@ -0,0 +1,459 @@
+"""
+Genera muchos fondos de pantalla en paralelo a partir de un archivo de
+especificaciones.
+
+El archivo es un JSON con los valores por defecto de todos los fondos, una
+lista de variantes que los cambian y, opcionalmente, una matriz de valores que
+se combinan con cada variante:
+
+```json
+{
+    "output_dir": "src/backgrounds/images",
+    "defaults": {"pattern": "grid", "gap": 30, "thickness": 2},
+    "matrix": {"size": [[1920, 1080], [3840, 2160]]},
+    "variants": [{"name": "fondo_negro_lineas_{width}x{height}"}]
+}
+```
+
+Los fondos se reparten entre varios procesos, cada proceso guarda los logos
+que ya leyó y redimensionó para los siguientes fondos, y un manifiesto en la
+carpeta de salida guarda el hash de la especificación de cada fondo, así que
+los fondos que no cambiaron desde la última ejecución no se vuelven a generar.
+
+Uso:
+    python -m src.backgrounds.wallpaper_batch src/backgrounds/wallpapers.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields
+from itertools import product
+from pathlib import Path
+from typing import Any, Iterator
+
+import cv2 as cv
+import numpy as np
+
+import src.backgrounds.background_maker as bg_maker
+
+MANIFEST_NAME = ".wallpapers.json"
+# Cambia cuando `render` da otro resultado, para volver a generar los fondos
+RENDER_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WallpaperSpec:
+    """
+    Especificación de un fondo de pantalla.
+
+    Attributes
+    ----------
+    name : str
+        Nombre del archivo PNG, sin extensión.
+    size : tuple[int, int]
+        Ancho y alto de la imagen.
+    background : tuple[int, int, int]
+        Color del fondo en RGB.
+    color : tuple[int, int, int]
+        Color del patrón en RGB.
+    pattern : bg_maker.Pattern
+        Rejilla de lineas, de puntos o ninguna.
+    gap : int
+        Espacio entre las lineas o los puntos.
+    thickness : int
+        Grueso de las lineas o radio de los puntos.
+    blur : int
+        Tamaño del kernel del desenfoque gaussiano, 0 para no desenfocar.
+    vignette : int | None
+        Sigma de la viñeta, None para no aplicarla.
+    invert : bool
+        Invertir los colores del fondo antes de poner el logo.
+    logo : str | None
+        Imagen del logo, None para no ponerlo.
+    logo_scale : float
+        Factor de cambio de tamaño del logo.
+    position : tuple[int, int]
+        Esquina superior izquierda del logo. Las coordenadas negativas se
+        cuentan desde la derecha o desde abajo, como los índices de Python.
+    """
+
+    name: str
+    size: tuple[int, int] = (1920, 1080)
+    background: tuple[int, int, int] = (0, 0, 0)
+    color: tuple[int, int, int] = (40, 40, 40)
+    pattern: bg_maker.Pattern = "grid"
+    gap: int = 30
+    thickness: int = 2
+    blur: int = 3
+    vignette: int | None = None
+    invert: bool = False
+    logo: str | None = None
+    logo_scale: float = 0.12
+    position: tuple[int, int] = (-90, -90)
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> "WallpaperSpec":
+        """
+        Crea una especificación de un diccionario del JSON.
+
+        Raises
+        ------
+        ValueError
+            Si tiene claves desconocidas o un patrón desconocido.
+        """
+        names = {spec_field.name for spec_field in fields(cls)}
+        if unknown := set(values) - names:
+            raise ValueError(f"Claves desconocidas: {sorted(unknown)}")
+        if values.get("pattern", "grid") not in ("grid", "dots", "none"):
+            raise ValueError(f"Patrón desconocido: {values['pattern']}")
+        # Las listas del JSON son tuplas, para poder usar la especificación de llave
+        return cls(
+            **{
+                key: tuple(value) if isinstance(value, list) else value
+                for key, value in values.items()
+            }
+        )
+
+    def digest(self) -> str:
+        """
+        Hash de la especificación y del archivo del logo, que cambia si
+        cualquiera de los dos cambia.
+        """
+        content: dict[str, Any] = asdict(self)
+        content["render_version"] = RENDER_VERSION
+        if self.logo is not None:
+            try:
+                stat = Path(self.logo).stat()
+                content["logo_file"] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                # Falla al generarse, y se reporta como los demás errores
+                content["logo_file"] = None
+        text = json.dumps(content, sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+def read_specs(path: Path) -> tuple[Path, list[WallpaperSpec]]:
+    """
+    Lee un archivo de especificaciones.
+
+    Parameters
+    ----------
+    path : Path
+        Archivo JSON con `output_dir`, `defaults`, `matrix` y `variants`.
+
+    Returns
+    -------
+    tuple[Path, list[WallpaperSpec]]
+        Carpeta de salida y las especificaciones de todos los fondos.
+
+    Raises
+    ------
+    ValueError
+        Si dos fondos tienen el mismo nombre o una especificación no es válida.
+    """
+    document = json.loads(path.read_text(encoding="utf-8"))
+    output_dir = Path(document.get("output_dir", path.parent))
+    defaults = document.get("defaults", {})
+    matrix: dict[str, list[Any]] = document.get("matrix", {})
+    specs = []
+    for variant in document.get("variants", [{}]):
+        for combination in product(*matrix.values()):
+            values = {**defaults, **dict(zip(matrix, combination)), **variant}
+            width, height = values.get("size", WallpaperSpec.size)
+            values["name"] = values["name"].format(**values, width=width, height=height)
+            specs.append(WallpaperSpec.from_dict(values))
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Hay fondos con el mismo nombre")
+    return output_dir, specs
+
+
+def render(spec: WallpaperSpec) -> bg_maker.Image:
+    """
+    Genera la imagen BGR de un fondo de pantalla.
+
+    Parameters
+    ----------
+    spec : WallpaperSpec
+        Especificación del fondo.
+
+    Returns
+    -------
+    Image
+        Imagen BGR lista para guardarse.
+    """
+    _, height = spec.size
+    _, image = next(render_bands(spec, height))
+    return image
+
+
+def render_bands(
+    spec: WallpaperSpec, band_height: int = 256
+) -> Iterator[tuple[int, bg_maker.Image]]:
+    """
+    Genera la imagen BGR de un fondo por franjas horizontales, para fondos que
+    no caben en memoria.
+
+    Cada franja pasa por todas las etapas del fondo: el patrón, el
+    desenfoque con las filas vecinas que necesita, la viñeta, la inversión y
+    el logo, y el resultado es igual al de `render`.
+
+    Parameters
+    ----------
+    spec : WallpaperSpec
+        Especificación del fondo.
+    band_height : int, optional
+        Filas de cada franja, by default 256
+
+    Yields
+    ------
+    tuple[int, Image]
+        Primera fila de la franja en la imagen y la franja.
+    """
+    width, height = spec.size
+    # Filas de más que el desenfoque lee arriba y abajo de cada franja
+    halo = spec.blur // 2
+    logo = None
+    if spec.logo is not None:
+        logo = bg_maker.load_overlay(spec.logo, spec.logo_scale)
+        x_coord, y_coord = spec.position
+        # Las coordenadas negativas se cuentan desde el borde opuesto
+        x_coord = x_coord + width if x_coord < 0 else x_coord
+        y_coord = y_coord + height if y_coord < 0 else y_coord
+
+    for top in range(0, height, band_height):
+        bottom = min(top + band_height, height)
+        start, stop = max(top - halo, 0), min(bottom + halo, height)
+        band = bg_maker.drawn_pattern(
+            spec.background,
+            spec.color,
+            spec.size,
+            spec.pattern,
+            spec.gap,
+            spec.thickness,
+            slice(start, stop),
+        )
+
+        band = cv.cvtColor(band, cv.COLOR_RGB2BGR)
+        if spec.blur:
+            band = cv.GaussianBlur(band, (spec.blur, spec.blur), 0)
+        band = band[top - start : bottom - start]
+        if spec.vignette is not None:
+            band = bg_maker.apply_vignette(band, spec.vignette, top, spec.size)
+        if spec.invert:
+            band = cv.bitwise_not(band, dst=band)
+
+        if logo is not None:
+            band = bg_maker.composite(band, [(logo, (x_coord, y_coord - top))])
+        yield top, band
+
+
+def write_npy(spec: WallpaperSpec, path: Path, band_height: int = 256) -> None:
+    """
+    Genera un fondo por franjas y las escribe una tras otra en un archivo
+    `.npy`, así que la memoria usada depende del ancho y de `band_height`,
+    pero no del alto del fondo.
+
+    El archivo se puede leer sin cargarlo completo con
+    `np.load(path, mmap_mode="r")`.
+
+    Parameters
+    ----------
+    spec : WallpaperSpec
+        Especificación del fondo.
+    path : Path
+        Archivo de salida.
+    band_height : int, optional
+        Filas de cada franja, by default 256
+    """
+    width, height = spec.size
+    header = {
+        "descr": np.lib.format.dtype_to_descr(np.dtype("uint8")),
+        "fortran_order": False,
+        "shape": (height, width, 3),
+    }
+    with open(path, "wb") as file:
+        np.lib.format.write_array_header_2_0(file, header)
+        for _, band in render_bands(spec, band_height):
+            file.write(np.ascontiguousarray(band).data)
+
+
+def render_to_file(
+    spec: WallpaperSpec, output_dir: Path, band_height: int | None = None
+) -> float:
+    """
+    Genera un fondo y lo guarda en la carpeta de salida, en un proceso.
+
+    Parameters
+    ----------
+    spec : WallpaperSpec
+        Especificación del fondo.
+    output_dir : Path
+        Carpeta de salida.
+    band_height : int | None, optional
+        Generarlo por franjas de estas filas en un `.npy` en vez de un PNG,
+        by default None
+
+    Returns
+    -------
+    float
+        Segundos que tardó en generarse y guardarse.
+    """
+    start = time.perf_counter()
+    path = output_path(spec, output_dir, band_height)
+    if band_height is not None:
+        write_npy(spec, path, band_height)
+    elif not cv.imwrite(str(path), render(spec)):
+        raise OSError(f"No se puede guardar {path}")
+    return time.perf_counter() - start
+
+
+def output_path(
+    spec: WallpaperSpec, output_dir: Path, band_height: int | None = None
+) -> Path:
+    """Archivo de un fondo, un PNG o un `.npy` si se genera por franjas."""
+    return output_dir / f"{spec.name}{'.png' if band_height is None else '.npy'}"
+
+
+@dataclass
+class BatchReport:
+    """
+    Resultado de un lote de fondos.
+
+    Attributes
+    ----------
+    rendered : list[str]
+        Fondos generados.
+    skipped : list[str]
+        Fondos que no cambiaron desde la última ejecución.
+    failed : dict[str, str]
+        Error de cada fondo que no se pudo generar.
+    seconds : float
+        Duración del lote.
+    """
+
+    rendered: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def pending_specs(
+    specs: list[WallpaperSpec],
+    output_dir: Path,
+    manifest: dict[str, str],
+    band_height: int | None = None,
+) -> Iterator[tuple[WallpaperSpec, str]]:
+    """
+    Especificaciones que cambiaron, o cuyo archivo ya no existe, con su hash.
+    """
+    for spec in specs:
+        digest = spec.digest()
+        path = output_path(spec, output_dir, band_height)
+        if manifest.get(spec.name) != digest or not path.exists():
+            yield spec, digest
+
+
+def render_batch(
+    specs: list[WallpaperSpec],
+    output_dir: Path,
+    workers: int | None = None,
+    force: bool = False,
+    band_height: int | None = None,
+) -> BatchReport:
+    """
+    Genera en paralelo los fondos que cambiaron desde la última ejecución.
+
+    Parameters
+    ----------
+    specs : list[WallpaperSpec]
+        Especificaciones de los fondos.
+    output_dir : Path
+        Carpeta de las imágenes y del manifiesto.
+    workers : int | None, optional
+        Número de procesos, by default el número de CPUs.
+    force : bool, optional
+        Generar todos los fondos aunque no hayan cambiado, by default False
+    band_height : int | None, optional
+        Generarlos por franjas de estas filas en archivos `.npy`, by default
+        None
+
+    Returns
+    -------
+    BatchReport
+        Fondos generados, saltados y fallidos.
+    """
+    start = time.perf_counter()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest: dict[str, str] = {}
+    if manifest_path.exists() and not force:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    report = BatchReport()
+    pending = dict(pending_specs(specs, output_dir, manifest, band_height))
+    report.skipped = [spec.name for spec in specs if spec not in pending]
+    # Los fondos con el mismo logo seguidos, para reusarlo en el mismo proceso
+    ordered = sorted(pending, key=lambda spec: (spec.logo or "", spec.logo_scale))
+    try:
+        with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+            futures = {
+                executor.submit(render_to_file, spec, output_dir, band_height): spec
+                for spec in ordered
+            }
+            for future in as_completed(futures):
+                spec = futures[future]
+                try:
+                    seconds = future.result()
+                except (OSError, ValueError, cv.error) as error:
+                    report.failed[spec.name] = str(error)
+                    logger.error("Falló %s: %s", spec.name, error)
+                    continue
+                manifest[spec.name] = pending[spec]
+                report.rendered.append(spec.name)
+                logger.info("Generado %s en %.3f s", spec.name, seconds)
+    finally:
+        # Guarda lo generado aunque el lote se interrumpa
+        manifest_path.write_text(
+            json.dumps(manifest, indent=4, sort_keys=True), encoding="utf-8"
+        )
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main() -> None:
+    """Función principal"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("specs", type=Path, help="Archivo JSON de especificaciones")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--force", action="store_true", help="Generar también los que no cambiaron"
+    )
+    parser.add_argument(
+        "--band-height",
+        type=int,
+        default=None,
+        help="Generar por franjas de estas filas en archivos .npy, para fondos enormes",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    output_dir, specs = read_specs(args.specs)
+    report = render_batch(specs, output_dir, args.workers, args.force, args.band_height)
+    logger.info(
+        "%d generados, %d sin cambios y %d fallidos en %.2f s",
+        len(report.rendered),
+        len(report.skipped),
+        len(report.failed),
+        report.seconds,
+    )
+
+
+if __name__ == "__main__":
+    main()
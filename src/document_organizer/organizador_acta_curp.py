@@ -1,8 +1,18 @@
 """
 Mueve las imágenes de actas de nacimiento y CURP de una carpeta a otra de acuerdo a su
 nombre y las reduce de tamaño.
+
+Las imágenes se procesan en varios hilos, ya que OpenCV suelta el GIL al leer, reducir
+y guardar, y un manifiesto en la carpeta de destino guarda el tamaño y la fecha de cada
+archivo terminado, así que volver a correrlo después de una interrupción solo procesa
+los que faltan.
 """
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
@@ -21,6 +31,10 @@ console_handler.setFormatter(formatter)
 
 logger.addHandler(console_handler)
 
+MANIFEST_NAME = ".organizador.json"
+# Archivos terminados entre cada vez que se guarda el manifiesto
+MANIFEST_EVERY = 200
+
 
 def change_size(img: Mat, rate: float) -> Mat:
     """
@@ -76,7 +90,141 @@ def make_output_document_path(document: Path, output_dir: Path) -> Path:
     return student_dir / document.name
 
 
-def move_images(input_dir: Path, output_dir: Path, reduction: Optional[float]) -> None:
+# Escalas a las que el decodificador de JPEG puede leer una imagen directamente
+REDUCED_READ_FLAGS = {
+    8: cv.IMREAD_REDUCED_COLOR_8,
+    4: cv.IMREAD_REDUCED_COLOR_4,
+    2: cv.IMREAD_REDUCED_COLOR_2,
+}
+
+
+def read_reduced(document: Path, reduction: Optional[float]) -> tuple[Mat, float]:
+    """
+    Lee una imagen a la menor escala de 1/2, 1/4 o 1/8 que no sea más chica que
+    la reducción, que es mucho más rápido y usa mucha menos memoria que leerla
+    completa y reducirla después.
+
+    Parameters
+    ----------
+    document : Path
+        Dirección del archivo.
+    reduction : Optional[float]
+        Razón de reducción de tamaño. Si es None no se reduce el tamaño.
+
+    Returns
+    -------
+    tuple[Mat, float]
+        La imagen y la razón que falta para reducirla, entre 0.5 y 1 si se leyó
+        reducida.
+
+    Raises
+    ------
+    OSError
+        Si no se puede leer la imagen.
+    """
+    flag, rate = cv.IMREAD_COLOR, reduction or 1
+    for factor, reduced_flag in REDUCED_READ_FLAGS.items():
+        if rate * factor <= 1:
+            flag, rate = reduced_flag, rate * factor
+            break
+    img = cv.imread(str(document), flag)
+    if img is None:
+        raise OSError(f"No se puede leer {document}")
+    return img, rate
+
+
+def process_document(
+    document: Path, output_dir: Path, reduction: Optional[float]
+) -> Path:
+    """
+    Lee un archivo, lo reduce de tamaño y lo guarda en la carpeta de su alumne.
+
+    Parameters
+    ----------
+    document : Path
+        Dirección del archivo.
+    output_dir : Path
+        Dirección de la carpeta de destino.
+    reduction : Optional[float]
+        Razón de reducción de tamaño. Si es None no se reduce el tamaño.
+
+    Returns
+    -------
+    Path
+        Dirección final del archivo.
+
+    Raises
+    ------
+    OSError
+        Si no se puede leer o guardar la imagen.
+    """
+    # Crea las carpetas necesarias
+    output_document_path = make_output_document_path(document, output_dir)
+
+    # Lee la imagen, ya reducida si se puede
+    img, rate = read_reduced(document, reduction)
+    # Termina de reducir el tamaño de la imagen
+    if rate != 1:
+        img = change_size(img, rate)
+    if reduction:
+        logger.debug("Reducido al %.2f%%", reduction * 100)
+
+    # Guarda la imagen en la nueva dirección
+    if not cv.imwrite(str(output_document_path), img):
+        raise OSError(f"No se puede guardar {output_document_path}")
+    return output_document_path
+
+
+@dataclass
+class MoveReport:
+    """
+    Resultado de mover una carpeta de imágenes.
+
+    Attributes
+    ----------
+    processed : int
+        Archivos procesados.
+    skipped : int
+        Archivos que ya estaban terminados de otra ejecución.
+    failed : dict[str, str]
+        Error de cada archivo que no se pudo procesar.
+    seconds : float
+        Duración del procesado.
+    """
+
+    processed: int = 0
+    skipped: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Archivos procesados por segundo."""
+        return self.processed / self.seconds if self.seconds else 0.0
+
+
+def document_signature(document: Path, reduction: Optional[float]) -> list:
+    """
+    Tamaño y fecha de modificación de un archivo, y la reducción con la que se
+    procesó, que cambian si hay que volver a procesarlo.
+    """
+    stat = document.stat()
+    return [stat.st_size, stat.st_mtime_ns, reduction]
+
+
+def save_manifest(path: Path, manifest: dict[str, list]) -> None:
+    """Guarda el manifiesto sin dejarlo a medias si se interrumpe."""
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(manifest, indent=4), encoding="utf-8")
+    temporary.replace(path)
+
+
+def move_images(
+    input_dir: Path,
+    output_dir: Path,
+    reduction: Optional[float],
+    workers: Optional[int] = None,
+) -> MoveReport:
     """
     Mueve los archivos de la carpeta de origen a la carpeta de destino.
     Los archivos pueden ser reducidos de tamaño o aumentados.
@@ -89,28 +237,71 @@ def move_images(input_dir: Path, output_dir: Path, reduction: Optional[float]) -
         Carpeta de destino.
     reduction : Optional[float]
         Razón de reducción de tamaño. Si es None no se reduce el tamaño.
+    workers : Optional[int], optional
+        Número de hilos, by default el número de CPUs.
+
+    Returns
+    -------
+    MoveReport
+        Archivos procesados, saltados y fallidos, y la duración.
 
     See Also
     --------
+    process_document : Procesa un archivo.
     make_output_document_path : Crea las carpetas de destino para un archivo.
-    bg_maker.change_size : Cambia el tamaño de una imagen.
     """
-    counter = 0
-    for counter, document in enumerate(input_dir.glob("*.JPG")):
-        # Crea las carpetas necesarias
-        output_document_path = make_output_document_path(document, output_dir)
-
-        # Lee la imagen
-        img = cv.imread(str(document))
-        # Reduce el tamaño de la imagen
-        if reduction:
-            img = change_size(img, reduction)
-            logger.debug("Reducido al %.2f%%", reduction * 100)
-
-        # Guarda la imagen en la nueva dirección
-        cv.imwrite(str(output_document_path), img)
-        logger.info("Copiado %s", document.name)
-    logger.info("Terminado procesado de %s archivos...", counter)
+    start = time.perf_counter()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest: dict[str, list] = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    report = MoveReport()
+    pending = {}
+    for document in input_dir.glob("*.JPG"):
+        signature = document_signature(document, reduction)
+        # La misma dirección que `make_output_document_path`, sin crear carpetas
+        student_dir = output_dir / " ".join(document.name.split()[:-1])
+        done = (student_dir / document.name).exists()
+        if done and manifest.get(document.name) == signature:
+            report.skipped += 1
+        else:
+            pending[document] = signature
+
+    try:
+        with ThreadPoolExecutor(workers or os.cpu_count()) as executor:
+            futures = {
+                executor.submit(process_document, doc, output_dir, reduction): doc
+                for doc in pending
+            }
+            for future in as_completed(futures):
+                document = futures[future]
+                try:
+                    future.result()
+                except (OSError, cv.error) as error:
+                    report.failed[document.name] = str(error)
+                    logger.error("Falló %s: %s", document.name, error)
+                    continue
+                manifest[document.name] = pending[document]
+                report.processed += 1
+                logger.info("Copiado %s", document.name)
+                if report.processed % MANIFEST_EVERY == 0:
+                    save_manifest(manifest_path, manifest)
+    finally:
+        # Guarda lo terminado aunque el procesado se interrumpa
+        save_manifest(manifest_path, manifest)
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        "Terminado procesado de %s archivos (%s sin cambios, %s fallidos) "
+        "en %.1f s, %.1f archivos/s",
+        report.processed,
+        report.skipped,
+        len(report.failed),
+        report.seconds,
+        report.throughput,
+    )
+    return report
 
 
 def main():
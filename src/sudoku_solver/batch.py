@@ -0,0 +1,231 @@
+"""Solve many Sudoku puzzles in parallel.
+
+The puzzles are read lazily, grouped in chunks and solved by a pool of
+processes, so the throughput scales with the number of cores. The solutions
+are returned in the same order as the puzzles, as soon as every chunk and the
+ones before it are finished, and only a few chunks are in flight at a time, so
+the memory does not grow with the size of the input.
+
+The puzzles and the solutions are written one per line in the compact format
+of `puzzle_io`. A puzzle that is not valid, has no solution or exhausts the
+budget of `--max-nodes` or `--timeout` is written as an empty grid, so every
+line of the solutions matches a puzzle.
+
+Usage:
+    python -m src.sudoku_solver.batch puzzles.txt solutions.txt --workers 4
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import batched
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+from src.sudoku_solver.puzzle_io import (
+    PuzzleWriter,
+    read_drawn_texts,
+    read_puzzle_lines,
+)
+from src.sudoku_solver.search_budget import SearchBudget
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+type Puzzle = Sequence[Sequence[int]]
+type Solutions = list[list[list[int]]]
+
+
+def map_in_order[
+    R
+](
+    function: Callable[..., R], arguments: Iterable[tuple], workers: int | None = None
+) -> Iterator[R]:
+    """
+    Call a function in a pool of processes, with a few calls in flight at once.
+
+    Args:
+        function (Callable[..., R]): Function called in the worker processes.
+        arguments (Iterable[tuple]): Arguments of every call, read lazily.
+        workers (int | None): Number of processes, by default the number of CPUs.
+    Yields:
+        R: The result of every call, in the order of the arguments.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Enough calls to keep every process busy, without reading all the input
+    max_pending = workers * 2
+    executor = ProcessPoolExecutor(workers)
+    pending: deque[Future[R]] = deque()
+    try:
+        for args in arguments:
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def solve_chunk(
+    chunk: Sequence[Puzzle | None],
+    max_solutions: int | None = 1,
+    max_nodes: int | None = None,
+    timeout: float | None = None,
+) -> list[Solutions]:
+    """
+    Solve a chunk of puzzles in a worker process.
+
+    The fastest solver of `SudokuGame` is used: the bitmask method with the
+    MRV heuristic and constraint propagation.
+
+    Args:
+        chunk (Sequence[Puzzle | None]): Puzzles to solve, None for a puzzle
+            that could not be read.
+        max_solutions (int | None): Maximum number of solutions of each puzzle.
+        max_nodes (int | None): Numbers tried in each puzzle before giving up.
+        timeout (float | None): Seconds spent in each puzzle before giving up.
+    Returns:
+        list[Solutions]: Rows of the solutions of every puzzle. A puzzle that
+        is not a valid grid has no solutions, and one that exhausts its
+        budget only the ones found before.
+    """
+    limited = max_nodes is not None or timeout is not None
+    results = []
+    for puzzle in chunk:
+        if puzzle is None:
+            results.append([])
+            continue
+        try:
+            sudoku = SudokuGame(
+                [list(row) for row in puzzle],
+                method="bitmask",
+                heuristic="mrv",
+                propagate=True,
+            )
+        except ValueError:
+            results.append([])
+            continue
+        # A new budget for every puzzle, so a pathological one cannot stall
+        # the rest of the chunk
+        budget = SearchBudget(max_nodes, timeout) if limited else None
+        solutions = sudoku.solve(max_solutions, budget)
+        results.append([solution.data for solution in solutions])
+    return results
+
+
+def solve_batch(
+    puzzles: Iterable[Puzzle | None],
+    max_solutions: int | None = 1,
+    workers: int | None = None,
+    chunk_size: int = 64,
+    max_nodes: int | None = None,
+    timeout: float | None = None,
+) -> Iterator[list[SudokuGrid]]:
+    """
+    Solve many puzzles with a pool of processes.
+
+    Example:
+    >>> for solutions in solve_batch(read_puzzles(Path("puzzles.txt"))):
+    ...     print(solutions[0])
+
+    Args:
+        puzzles (Iterable[Puzzle | None]): Puzzles to solve, read lazily. A
+            None puzzle, that could not be read, has no solutions.
+        max_solutions (int | None): Maximum number of solutions of each puzzle.
+        workers (int | None): Number of processes, by default the number of CPUs.
+        chunk_size (int): Number of puzzles sent at once to a process.
+        max_nodes (int | None): Numbers tried in each puzzle before giving up.
+        timeout (float | None): Seconds spent in each puzzle before giving up.
+    Yields:
+        list[SudokuGrid]: The solutions of every puzzle, in the input order.
+    """
+    chunks = (
+        (chunk, max_solutions, max_nodes, timeout)
+        for chunk in batched(puzzles, chunk_size)
+    )
+    for results in map_in_order(solve_chunk, chunks, workers):
+        for solutions in results:
+            yield [SudokuGrid(solution) for solution in solutions]
+
+
+def parse_puzzles(
+    texts: Iterable[str],
+    parse: Callable[[str], SudokuGrid],
+    sizes: deque[int],
+    box_size: int = 3,
+) -> Iterator[SudokuGrid | None]:
+    """
+    Parse lazily the texts of the puzzles, without stopping at the invalid ones.
+
+    Args:
+        texts (Iterable[str]): Text of every puzzle.
+        parse (Callable[[str], SudokuGrid]): Reads the grid of a text.
+        sizes (deque[int]): Where the size of every grid is appended, to write
+            an empty grid of that size if needed.
+        box_size (int): Size of the boxes of the invalid puzzles.
+    Yields:
+        SudokuGrid | None: Every grid, or None if its text is not valid.
+    """
+    for text in texts:
+        try:
+            grid = parse(text)
+        except ValueError:
+            sizes.append(box_size * box_size)
+            yield None
+        else:
+            sizes.append(grid.geometry.size)
+            yield grid
+
+
+def main() -> None:
+    """Main program"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("puzzles", type=Path, help="File with the puzzles")
+    parser.add_argument("solutions", type=Path, help="File to write the solutions")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument(
+        "--drawn",
+        action="store_true",
+        help="Read the puzzles in the format of SudokuGame.save_results",
+    )
+    parser.add_argument(
+        "--box-size",
+        type=int,
+        default=3,
+        help="Box size of the drawn puzzles and of the lines that are not valid",
+    )
+    parser.add_argument(
+        "--max-nodes", type=int, default=None, help="Node budget of every puzzle"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Seconds for every puzzle"
+    )
+    args = parser.parse_args()
+
+    if args.drawn:
+        texts: Iterable[str] = read_drawn_texts(args.puzzles, args.box_size)
+        parse = partial(SudokuGrid.from_string, box_size=args.box_size)
+    else:
+        texts = (line for _, line in read_puzzle_lines(args.puzzles))
+        parse = SudokuGrid.from_line
+    sizes: deque[int] = deque()
+    with PuzzleWriter(args.solutions) as writer:
+        for solutions in solve_batch(
+            parse_puzzles(texts, parse, sizes, args.box_size),
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_nodes=args.max_nodes,
+            timeout=args.timeout,
+        ):
+            size = sizes.popleft()
+            # An invalid, unsolvable or too slow puzzle is written as an empty grid
+            writer.write(
+                solutions[0]
+                if solutions
+                else SudokuGrid([[0] * size for _ in range(size)])
+            )
+
+
+if __name__ == "__main__":
+    main()
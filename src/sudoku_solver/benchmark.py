@@ -0,0 +1,217 @@
+"""Benchmark the Sudoku solvers on curated sets of puzzles.
+
+Every corpus is solved with the selected method, and the throughput, the
+latency percentiles, the peak memory and the `SolverStats` of the searches are
+reported, so the solvers can be compared and the regressions spotted.
+
+The corpora are:
+- easy: solved by the singles of the propagation.
+- hard: need search after the singles and pairs of the propagation.
+- 17_clue: puzzles with the minimum number of clues of a unique solution.
+- pathological: built against the solvers, such as a puzzle that fools the
+  row-major order, an empty grid and a puzzle without solution.
+
+The "backtracking" method needs minutes for the first pathological puzzle, so
+that corpus is skipped with it.
+
+Usage:
+    python -m src.sudoku_solver.benchmark --method dlx --corpus hard
+"""
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from math import ceil
+from pathlib import Path
+from typing import Sequence
+
+from src.sudoku_solver.puzzle_io import read_puzzles
+from src.sudoku_solver.solver_stats import SolverStats
+from src.sudoku_solver.sudoku_solver_oop import (
+    HEURISTICS,
+    METHODS,
+    Heuristic,
+    Method,
+    SudokuGame,
+    SudokuGrid,
+)
+
+CORPORA: dict[str, tuple[str, ...]] = {
+    "easy": (
+        "..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..",
+        "2...8.3...6..7..84.3.5..2.9...1.54.8.........4.27.6...3.1..7.4.72..4..6...4.1...3",
+        "......9.7...42.18....7.5.261..9.4....5.....4....5.7..992.1.8....34.59...5.7......",
+        ".3..5..4...8.1.5..46.....12.7.5.2.8....6.3....4.1.9.3.25.....98..1.2.6...8..6..2.",
+    ),
+    "hard": (
+        "......7...4..3..65..1..8....6..5..394..6............2.8....3.97....7.4...9....2..",
+        "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+        "..53.....8......2..7..1.5..4....53...1..7...6..32...8..6.5....9..4....3......97..",
+        "12..4......5.69.1...9...5.........7.7...52.9..3......2.9.6...5.4..9..8.1..3...9.4",
+        "...57..3.1......2.7...234......8...4..7..4...49....6.5.42...3.....7..9....18.....",
+        "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+    ),
+    "17_clue": (
+        ".......1.4.........2...........5.4.7..8...3....1.9....3..4..2...5.1........8.6...",
+        ".......1.4.........2...........5.6.4..8...3....1.9....3..4..2...5.1........8.7...",
+        ".......12....35......6...7.7.....3.....4..8..1...........12.....8.....4..5....6..",
+        ".......12..36..........7...41..2.......5..3..7.....6..28.....4....3..5...........",
+        ".......12..8.3...........4.12.5..........47...6.......5.7...3.....62.......1.....",
+    ),
+    "pathological": (
+        "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+        "." * 81,
+        "12345678." + "." * 71 + "9",
+        "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    ),
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measures of a solver on a corpus.
+
+    Attributes:
+        corpus (str): Name of the corpus.
+        latencies (list[float]): Seconds to solve every puzzle.
+        peak_memory (int): Most bytes allocated while solving a puzzle.
+        stats (SolverStats): Sum of the counters of all the searches.
+    """
+
+    corpus: str
+    latencies: list[float] = field(default_factory=list)
+    peak_memory: int = 0
+    stats: SolverStats = field(default_factory=SolverStats)
+
+    @property
+    def puzzles_per_second(self) -> float:
+        """Puzzles solved per second of search."""
+        total = sum(self.latencies)
+        return len(self.latencies) / total if total else float("inf")
+
+    def percentile(self, percent: float) -> float:
+        """Latency that is not exceeded by `percent`% of the puzzles."""
+        latencies = sorted(self.latencies)
+        rank = ceil(percent / 100 * len(latencies))
+        return latencies[max(rank - 1, 0)]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.corpus:<13} {len(self.latencies):>5} "
+            f"{self.puzzles_per_second:>10.1f} "
+            f"{self.percentile(50) * 1000:>9.3f} {self.percentile(99) * 1000:>9.3f} "
+            f"{self.peak_memory / 1024:>9.1f} "
+            f"{self.stats.nodes:>9} {self.stats.backtracks:>9} "
+            f"{self.stats.max_depth:>5} {self.stats.propagations:>9}"
+        )
+
+
+HEADER = (
+    f"{'corpus':<13} {'count':>5} {'puzzles/s':>10} {'p50 ms':>9} {'p99 ms':>9} "
+    f"{'peak KiB':>9} {'nodes':>9} {'backtrack':>9} {'depth':>5} {'propagate':>9}"
+)
+
+
+def run_benchmark(
+    corpus: str,
+    puzzles: Sequence[SudokuGrid],
+    method: Method = "bitmask",
+    heuristic: Heuristic | None = None,
+    propagate: bool | None = None,
+    repeat: int = 1,
+    max_solutions: int = 1,
+) -> BenchmarkResult:
+    """
+    Solve every puzzle of a corpus and measure it.
+
+    The times are measured without tracing the memory, which slows down the
+    allocations, so the peak memory is measured in a separate run.
+
+    Args:
+        corpus (str): Name of the corpus.
+        puzzles (Sequence[SudokuGrid]): Puzzles of the corpus.
+        method (Method): Solver of `SudokuGame`.
+        heuristic (Heuristic | None): Cell selection of the "bitmask" method,
+            by default "mrv" with it and "row_major" with the other methods.
+        propagate (bool | None): Apply the propagation in the "bitmask"
+            method, by default only with it.
+        repeat (int): Times every puzzle is solved, keeping the fastest.
+        max_solutions (int): Solutions searched in every puzzle.
+    Returns:
+        BenchmarkResult: The measures of the corpus.
+    """
+    # The heuristics and the propagation are options of the bitmask method
+    bitmask = method == "bitmask"
+    if heuristic is None:
+        heuristic = "mrv" if bitmask else "row_major"
+    if propagate is None:
+        propagate = bitmask
+    result = BenchmarkResult(corpus)
+    for puzzle in puzzles:
+        sudoku = SudokuGame(
+            puzzle.copy(), method, heuristic, propagate, collect_stats=True
+        )
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sudoku.count_solutions(max_solutions)
+            best = min(best, time.perf_counter() - start)
+        result.latencies.append(best)
+        if sudoku.stats is not None:
+            result.stats += sudoku.stats
+
+        tracemalloc.start()
+        try:
+            sudoku.count_solutions(max_solutions)
+            result.peak_memory = max(
+                result.peak_memory, tracemalloc.get_traced_memory()[1]
+            )
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def main() -> None:
+    """Main program"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", choices=METHODS, default="bitmask")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="mrv")
+    parser.add_argument(
+        "--propagate", action=argparse.BooleanOptionalAction, default=True
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--corpus", choices=list(CORPORA), action="append", help="Default all"
+    )
+    parser.add_argument(
+        "--file", type=Path, action="append", default=[], help="Extra corpus"
+    )
+    args = parser.parse_args()
+
+    corpora = {
+        name: [SudokuGrid.from_line(line) for line in CORPORA[name]]
+        for name in args.corpus or CORPORA
+    }
+    for path in args.file:
+        corpora[path.stem] = list(read_puzzles(path))
+
+    bitmask = args.method == "bitmask"
+    if args.method == "backtracking" and corpora.pop("pathological", None):
+        print("Skipped the pathological corpus, too slow for backtracking")
+    print(HEADER)
+    for name, puzzles in corpora.items():
+        print(
+            run_benchmark(
+                name,
+                puzzles,
+                args.method,
+                args.heuristic if bitmask else "row_major",
+                args.propagate and bitmask,
+                args.repeat,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
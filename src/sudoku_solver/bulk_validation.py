@@ -0,0 +1,89 @@
+"""Validate many Sudoku grids at once with NumPy.
+
+The grids are given as an array of shape (N, 9, 9), where 0 is an empty cell,
+and every check is a vectorized reduction over all the grids, instead of
+building a `SudokuGrid` for each one. Grids of other box sizes, such as
+(N, 16, 16), are validated the same way.
+"""
+from enum import IntFlag, auto
+
+import numpy as np
+import numpy.typing as npt
+
+from src.sudoku_solver.sudoku_solver_oop import box_size_of
+
+
+class GridError(IntFlag):
+    """Errors found in a grid, combined as flags"""
+
+    NONE = 0
+    RANGE = auto()
+    ROW = auto()
+    COLUMN = auto()
+    BOX = auto()
+    INCOMPLETE = auto()
+
+
+def validate_grids(
+    grids: npt.ArrayLike, complete: bool = False, chunk_size: int = 65536
+) -> tuple[npt.NDArray[np.bool_], npt.NDArray[np.uint8]]:
+    """
+    Validate a batch of complete or partial grids.
+
+    Example:
+    >>> valid, errors = validate_grids(np.zeros((2, 9, 9), dtype=np.uint8))
+    >>> valid
+    array([ True,  True])
+
+    Args:
+        grids (npt.ArrayLike): Integer array of shape (N, 9, 9), or (9, 9) for a
+            single grid. Other square sizes of boxes, as (N, 16, 16), are
+            also accepted.
+        complete (bool): The grids must not have empty cells.
+        chunk_size (int): Number of grids checked at once, which bounds the
+            memory of the intermediate arrays.
+    Returns:
+        tuple[npt.NDArray[np.bool_], npt.NDArray[np.uint8]]: Mask of the valid
+        grids and the `GridError` flags of every grid.
+    Raises:
+        ValueError: If the array does not have the shape of a batch of grids.
+        TypeError: If the array is not of integers.
+    """
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[np.newaxis]
+    if grids.ndim != 3 or grids.shape[1] != grids.shape[2]:
+        raise ValueError(f"Expected an array of shape (N, 9, 9), got {grids.shape}")
+    box_size = box_size_of(grids.shape[1])
+    if not np.issubdtype(grids.dtype, np.integer):
+        raise TypeError(f"Expected an array of integers, got {grids.dtype}")
+
+    errors = np.zeros(len(grids), dtype=np.uint8)
+    for start in range(0, len(grids), chunk_size):
+        chunk = grids[start : start + chunk_size]
+        errors[start : start + chunk_size] = _chunk_errors(chunk, box_size, complete)
+    return errors == GridError.NONE, errors
+
+
+def _chunk_errors(
+    grids: np.ndarray, box_size: int, complete: bool
+) -> npt.NDArray[np.uint8]:
+    """`GridError` flags of every grid of a chunk."""
+    size = box_size * box_size
+    errors = np.zeros(len(grids), dtype=np.uint8)
+    errors[((grids < 0) | (grids > size)).any(axis=(1, 2))] |= np.uint8(GridError.RANGE)
+    if complete:
+        errors[(grids == 0).any(axis=(1, 2))] |= np.uint8(GridError.INCOMPLETE)
+
+    # (N, row, column, number): the cells that have every number. The empty
+    # cells and the numbers out of range have none.
+    one_hot = grids[..., np.newaxis] == np.arange(1, size + 1)
+    repeated_row = (one_hot.sum(axis=2, dtype=np.uint8) > 1).any(axis=(1, 2))
+    repeated_column = (one_hot.sum(axis=1, dtype=np.uint8) > 1).any(axis=(1, 2))
+    # (N, box row, row in box, box column, column in box, number)
+    boxes = one_hot.reshape(len(grids), *(box_size,) * 4, size)
+    repeated_box = (boxes.sum(axis=(2, 4), dtype=np.uint8) > 1).any(axis=(1, 2, 3))
+    errors[repeated_row] |= np.uint8(GridError.ROW)
+    errors[repeated_column] |= np.uint8(GridError.COLUMN)
+    errors[repeated_box] |= np.uint8(GridError.BOX)
+    return errors
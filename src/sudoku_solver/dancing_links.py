@@ -0,0 +1,323 @@
+"""Exact cover Sudoku solver using Dancing Links (Algorithm X).
+
+A Sudoku is an exact cover problem: every one of the 729 possible placements
+(row, column, number) covers 4 of the 324 constraints of the puzzle, which are
+
+- each cell has a number (81 columns),
+- each row has every number (81 columns),
+- each column has every number (81 columns),
+- each box has every number (81 columns),
+
+and a solution is a set of placements that covers every constraint exactly once.
+Grids of other box sizes have the same constraints for their size, such as the
+4096 placements and 1024 constraints of a 16x16 grid.
+
+The constraint matrix is stored as the circular doubly linked lists of Knuth's
+Dancing Links, in flat lists of integers. The matrix never changes between
+puzzles, so every search restores it when it finishes and `dancing_links`
+lends the same matrices again to the next searches. A search modifies its
+matrix while it runs or is paused, so two searches never share one.
+"""
+from contextlib import closing, contextmanager
+from itertools import islice
+from threading import Lock
+from typing import Iterator, Sequence
+
+from src.sudoku_solver.search_budget import SearchBudget
+from src.sudoku_solver.solver_stats import SolverStats
+
+
+class DancingLinks:
+    """
+    The Sudoku constraint matrix as Dancing Links, 729x324 for a 9x9 grid.
+
+    Node 0 is the root, the next nodes are the column headers and the rest are
+    the 4 nodes of every placement. The matrix is modified while searching, so an
+    instance must not be used by two searches at the same time.
+
+    Attributes:
+        box_size (int): Rows and columns of every box of the grid.
+        grid_size (int): Rows and columns of the grid, and the highest number.
+        left, right, up, down (list[int]): Links of every node.
+        column (list[int]): Column header of every node.
+        placement (list[int]): Placement ``(row * grid_size + column) *
+            grid_size + number - 1`` of every node.
+        size (list[int]): Number of nodes left in every column.
+        first_node (list[int]): First node of every placement.
+    """
+
+    def __init__(self, box_size: int = 3) -> None:
+        self.box_size = box_size
+        self.grid_size = box_size * box_size
+        cells = self.grid_size * self.grid_size
+        constraints = cells * 4
+        headers = constraints + 1
+        self.left = [index - 1 for index in range(headers)]
+        self.right = [index + 1 for index in range(headers)]
+        self.left[0], self.right[-1] = constraints, 0
+        self.up = list(range(headers))
+        self.down = list(range(headers))
+        self.column = list(range(headers))
+        self.placement = [-1] * headers
+        self.size = [0] * headers
+        self.first_node: list[int] = []
+        for placement in range(cells * self.grid_size):
+            first = len(self.column)
+            self.first_node.append(first)
+            columns = self.constraints(placement)
+            for offset, column in enumerate(columns):
+                node = first + offset
+                # Link the node in its row
+                self.left.append(first + (offset - 1) % 4)
+                self.right.append(first + (offset + 1) % 4)
+                # Link the node at the bottom of its column
+                self.up.append(self.up[column])
+                self.down.append(column)
+                self.down[self.up[column]] = node
+                self.up[column] = node
+                self.column.append(column)
+                self.placement.append(placement)
+                self.size[column] += 1
+
+    def constraints(self, placement: int) -> tuple[int, int, int, int]:
+        """
+        Column headers of the 4 constraints covered by a placement.
+
+        Args:
+            placement (int): Index ``(row * grid_size + column) * grid_size +
+                number - 1``.
+        Returns:
+            tuple[int, int, int, int]: Cell, row, column and box constraints.
+        """
+        size, box_size = self.grid_size, self.box_size
+        cells = size * size
+        cell, num = divmod(placement, size)
+        pos_y, pos_x = divmod(cell, size)
+        box = (pos_y // box_size) * box_size + pos_x // box_size
+        return (
+            1 + cell,
+            1 + cells + pos_y * size + num,
+            1 + cells * 2 + pos_x * size + num,
+            1 + cells * 3 + box * size + num,
+        )
+
+    def _cover(self, column: int) -> None:
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+        row = down[column]
+        while row != column:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                self.size[self.column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def _uncover(self, column: int) -> None:
+        left, right, up, down = self.left, self.right, self.up, self.down
+        row = up[column]
+        while row != column:
+            node = left[row]
+            while node != row:
+                self.size[self.column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[column]] = column
+        left[right[column]] = column
+
+    def _select(self, first: int) -> None:
+        """Cover the other columns of the row of a node."""
+        node = self.right[first]
+        while node != first:
+            self._cover(self.column[node])
+            node = self.right[node]
+
+    def _unselect(self, first: int) -> None:
+        node = self.left[first]
+        while node != first:
+            self._uncover(self.column[node])
+            node = self.left[node]
+
+    def solutions(
+        self,
+        grid: Sequence[Sequence[int]],
+        stats: SolverStats | None = None,
+        budget: SearchBudget | None = None,
+    ) -> Iterator[list[list[int]]]:
+        """
+        Find all the solutions of a puzzle.
+
+        The matrix is restored when the generator is exhausted or closed.
+
+        Args:
+            grid (Sequence[Sequence[int]]): Puzzle of the size of the matrix,
+                where 0 is an empty cell.
+            stats (SolverStats | None): Counters of the search to update, where
+                a node is a placement selected by the search.
+            budget (SearchBudget | None): Limits of the search.
+        Yields:
+            list[list[int]]: A new grid for every solution.
+        Raises:
+            SearchStopped: If the budget stops the search.
+        """
+        size = self.grid_size
+        given: list[int] = []
+        try:
+            if not self._place_givens(grid, given):
+                return
+            for placements in self._search([], stats, budget):
+                solution = [list(row) for row in grid]
+                for placement in placements:
+                    cell, num = divmod(placement, size)
+                    solution[cell // size][cell % size] = num + 1
+                yield solution
+        finally:
+            self._remove_givens(given)
+
+    def count(
+        self,
+        grid: Sequence[Sequence[int]],
+        limit: int | None = None,
+        stats: SolverStats | None = None,
+        budget: SearchBudget | None = None,
+    ) -> int:
+        """
+        Count the solutions of a puzzle without building their grids.
+
+        Args:
+            grid (Sequence[Sequence[int]]): Puzzle of the size of the matrix,
+                where 0 is an empty cell.
+            limit (int | None): Stop counting when this number is reached.
+            stats (SolverStats | None): Counters of the search to update.
+            budget (SearchBudget | None): Limits of the search.
+        Returns:
+            int: Number of solutions found, at most `limit`.
+        Raises:
+            SearchStopped: If the budget stops the search.
+        """
+        given: list[int] = []
+        try:
+            if not self._place_givens(grid, given):
+                return 0
+            with closing(self._search([], stats, budget)) as search:
+                return sum(1 for _ in islice(search, limit))
+        finally:
+            self._remove_givens(given)
+
+    def _place_givens(self, grid: Sequence[Sequence[int]], given: list[int]) -> bool:
+        """
+        Select the placements of the numbers of a puzzle.
+
+        Args:
+            grid (Sequence[Sequence[int]]): Puzzle of the size of the matrix.
+            given (list[int]): Where the first node of every selected placement
+                is appended, to remove them with `_remove_givens`.
+        Returns:
+            bool: False if a number clashes with another one.
+        """
+        size = self.grid_size
+        for pos_y, row in enumerate(grid):
+            for pos_x, num in enumerate(row):
+                if not num:
+                    continue
+                placement = (pos_y * size + pos_x) * size + num - 1
+                # A given that clashes with another given cannot be placed
+                if any(
+                    self.right[self.left[column]] != column
+                    for column in self.constraints(placement)
+                ):
+                    return False
+                first = self.first_node[placement]
+                self._cover(self.column[first])
+                self._select(first)
+                given.append(first)
+        return True
+
+    def _remove_givens(self, given: list[int]) -> None:
+        for first in reversed(given):
+            self._unselect(first)
+            self._uncover(self.column[first])
+
+    def _search(
+        self,
+        placements: list[int],
+        stats: SolverStats | None,
+        budget: SearchBudget | None = None,
+    ) -> Iterator[list[int]]:
+        right, size = self.right, self.size
+        if right[0] == 0:
+            yield placements
+            return
+        # Choose the column with the fewest rows
+        column, best = 0, len(self.first_node) + 1
+        header = right[0]
+        while header != 0:
+            if size[header] < best:
+                column, best = header, size[header]
+                if best <= 1:
+                    break
+            header = right[header]
+        if stats is not None:
+            stats.max_depth = max(stats.max_depth, len(placements) + 1)
+        if best == 0:
+            if stats is not None:
+                stats.backtracks += 1
+            return
+        self._cover(column)
+        try:
+            row = self.down[column]
+            while row != column:
+                self._select(row)
+                placements.append(self.placement[row])
+                if stats is not None:
+                    stats.nodes += 1
+                try:
+                    if budget is not None:
+                        budget.spend()
+                    yield from self._search(placements, stats, budget)
+                finally:
+                    placements.pop()
+                    self._unselect(row)
+                row = self.down[row]
+            if stats is not None:
+                stats.backtracks += 1
+        finally:
+            self._uncover(column)
+
+
+# Matrices that no search is using, by box size
+_free_matrices: dict[int, list[DancingLinks]] = {}
+_free_matrices_lock = Lock()
+
+
+@contextmanager
+def dancing_links(box_size: int = 3) -> Iterator[DancingLinks]:
+    """
+    Lend a Sudoku constraint matrix of a box size to a search.
+
+    The matrices are reused by the next searches, and a new one is only built
+    when all of them are lent, such as while a lazy search is paused.
+
+    Example:
+    >>> with dancing_links() as matrix:
+    ...     solutions = list(matrix.solutions(grid))
+
+    Args:
+        box_size (int): Rows and columns of every box of the grid.
+    Yields:
+        DancingLinks: A matrix that no other search uses until it is returned.
+    """
+    with _free_matrices_lock:
+        free = _free_matrices.setdefault(box_size, [])
+        matrix = free.pop() if free else None
+    if matrix is None:
+        matrix = DancingLinks(box_size)
+    try:
+        yield matrix
+    finally:
+        with _free_matrices_lock:
+            free.append(matrix)
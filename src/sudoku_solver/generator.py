@@ -0,0 +1,262 @@
+"""Generate Sudoku puzzles with a unique solution.
+
+A puzzle is made by filling a random valid grid and then removing its numbers
+in a random order, keeping every removal that leaves the puzzle with a single
+solution. The difficulty of the puzzle is rated by the logical rules of
+`ConstraintMasks.propagate` that are needed to solve it without guessing.
+
+Many puzzles are generated in parallel by a pool of processes, and written one
+per line in the compact format of `puzzle_io`.
+
+Usage:
+    python -m src.sudoku_solver.generator 1000 puzzles.txt --difficulty hard
+"""
+import argparse
+import random
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import Iterator
+
+from src.sudoku_solver.batch import map_in_order
+from src.sudoku_solver.puzzle_io import PuzzleWriter
+from src.sudoku_solver.sudoku_solver_oop import (
+    ConstraintMasks,
+    SudokuGame,
+    SudokuGrid,
+    geometry,
+)
+
+
+class Difficulty(StrEnum):
+    """Logical rules needed to solve a puzzle"""
+
+    EASY = "easy"  # Naked and hidden singles
+    MEDIUM = "medium"  # Singles and pairs
+    HARD = "hard"  # Search
+
+
+@dataclass
+class GeneratedPuzzle:
+    """
+    A generated puzzle.
+
+    Attributes:
+        grid (SudokuGrid): The puzzle, with a unique solution.
+        solution (SudokuGrid): The solution of the puzzle.
+        difficulty (Difficulty): Rules needed to solve the puzzle.
+    """
+
+    grid: SudokuGrid
+    solution: SudokuGrid
+    difficulty: Difficulty
+
+
+def random_solution(rng: random.Random, box_size: int = 3) -> SudokuGrid:
+    """
+    Fill an empty grid with random numbers following the Sudoku rules.
+
+    The boxes of the diagonal do not share any row or column, so they are
+    filled with random permutations and the rest of the grid is solved. In
+    small grids some of those boxes have no solution, and they are filled
+    again.
+
+    Args:
+        rng (random.Random): Source of the random numbers.
+        box_size (int): Rows and columns of every box.
+    Returns:
+        SudokuGrid: A complete and valid grid.
+    """
+    size = box_size * box_size
+    while True:
+        grid = [[0] * size for _ in range(size)]
+        for box in range(0, size, box_size):
+            numbers = rng.sample(range(1, size + 1), size)
+            for index, num in enumerate(numbers):
+                grid[box + index // box_size][box + index % box_size] = num
+        sudoku = SudokuGame(grid, method="bitmask", heuristic="mrv", propagate=True)
+        if solutions := sudoku.solve(max_solutions=1):
+            return solutions[0]
+
+
+def remove_clues(
+    solution: SudokuGrid, rng: random.Random, min_clues: int = 0
+) -> SudokuGrid:
+    """
+    Empty the cells of a grid in a random order while it has a unique solution.
+
+    Args:
+        solution (SudokuGrid): A complete grid.
+        rng (random.Random): Source of the random order.
+        min_clues (int): Numbers that are always left in the grid.
+    Returns:
+        SudokuGrid: A puzzle whose only solution is `solution`, where no
+        other number can be removed without losing the uniqueness.
+    """
+    sudoku = SudokuGame(
+        solution.copy(), method="bitmask", heuristic="mrv", propagate=True
+    )
+    data = sudoku.grid.data
+    cells = list(geometry(solution.box_size).cells)
+    rng.shuffle(cells)
+    clues = len(cells)
+    for pos_y, pos_x in cells:
+        if clues <= min_clues:
+            break
+        num = data[pos_y][pos_x]
+        data[pos_y][pos_x] = 0
+        if sudoku.count_solutions(limit=2) == 1:
+            clues -= 1
+        else:
+            data[pos_y][pos_x] = num
+    return sudoku.grid
+
+
+def rate(grid: SudokuGrid) -> Difficulty:
+    """
+    Difficulty of a puzzle with a unique solution.
+
+    Example:
+    >>> rate(SudokuGrid.from_line("..3.2.6..9..3.5..1..18.64....81.29..7.......8"
+    ...                           "..67.82....26.95..8..2.3..9..5.1.3.."))
+    <Difficulty.EASY: 'easy'>
+
+    Args:
+        grid (SudokuGrid): The puzzle, which is not modified.
+    Returns:
+        Difficulty: EASY if the singles fill the grid, MEDIUM if the pairs are
+        also needed and HARD if it cannot be solved without search.
+    """
+    masks = ConstraintMasks(grid.copy())
+    for pairs, difficulty in ((False, Difficulty.EASY), (True, Difficulty.MEDIUM)):
+        if masks.propagate(pairs=pairs) and not masks.empty_cells():
+            return difficulty
+    return Difficulty.HARD
+
+
+def generate(
+    rng: random.Random,
+    difficulty: Difficulty | None = None,
+    box_size: int = 3,
+    max_tries: int = 100,
+) -> GeneratedPuzzle:
+    """
+    Generate a puzzle with a unique solution.
+
+    Every removed clue is checked with a search, which is fast up to 9x9 grids
+    but may take minutes for a 16x16 grid.
+
+    Example:
+    >>> puzzle = generate(random.Random(42), Difficulty.HARD)
+    >>> print(puzzle.grid)
+
+    Args:
+        rng (random.Random): Source of the random numbers.
+        difficulty (Difficulty | None): Difficulty of the puzzle, any if None.
+        box_size (int): Rows and columns of every box.
+        max_tries (int): Puzzles generated to find one of the difficulty.
+    Returns:
+        GeneratedPuzzle: The puzzle with its solution and difficulty.
+    Raises:
+        ValueError: If no puzzle of the difficulty is found in `max_tries`.
+    """
+    for _ in range(max_tries):
+        solution = random_solution(rng, box_size)
+        grid = remove_clues(solution, rng)
+        rating = rate(grid)
+        if difficulty is None or rating == difficulty:
+            return GeneratedPuzzle(grid, solution, rating)
+    raise ValueError(f"No {difficulty} puzzle found in {max_tries} tries")
+
+
+def generate_chunk(
+    count: int, seed: int, difficulty: Difficulty | None = None, box_size: int = 3
+) -> list[tuple[str, str, Difficulty]]:
+    """
+    Generate a chunk of puzzles in a worker process.
+
+    Args:
+        count (int): Number of puzzles.
+        seed (int): Seed of the random numbers of the chunk.
+        difficulty (Difficulty | None): Difficulty of the puzzles, any if None.
+        box_size (int): Rows and columns of every box.
+    Returns:
+        list[tuple[str, str, Difficulty]]: Compact lines of the puzzle and the
+        solution, and the difficulty of every puzzle.
+    """
+    rng = random.Random(seed)
+    puzzles = (generate(rng, difficulty, box_size) for _ in range(count))
+    return [
+        (puzzle.grid.to_line(), puzzle.solution.to_line(), puzzle.difficulty)
+        for puzzle in puzzles
+    ]
+
+
+def generate_batch(
+    count: int,
+    difficulty: Difficulty | None = None,
+    box_size: int = 3,
+    seed: int | None = None,
+    workers: int | None = None,
+    chunk_size: int = 16,
+) -> Iterator[GeneratedPuzzle]:
+    """
+    Generate many puzzles with a pool of processes.
+
+    Every chunk has its own seed derived from `seed`, so the same seed
+    generates the same puzzles with any number of workers.
+
+    Example:
+    >>> with PuzzleWriter(Path("puzzles.txt")) as writer:
+    ...     writer.write_all(puzzle.grid for puzzle in generate_batch(1000))
+
+    Args:
+        count (int): Number of puzzles.
+        difficulty (Difficulty | None): Difficulty of the puzzles, any if None.
+        box_size (int): Rows and columns of every box.
+        seed (int | None): Seed of the random numbers, random if None.
+        workers (int | None): Number of processes, by default the number of CPUs.
+        chunk_size (int): Number of puzzles generated at once by a process.
+    Yields:
+        GeneratedPuzzle: Every generated puzzle.
+    """
+    seeds = random.Random(seed)
+    chunks = (
+        (min(chunk_size, count - start), seeds.getrandbits(64), difficulty, box_size)
+        for start in range(0, count, chunk_size)
+    )
+    for chunk in map_in_order(generate_chunk, chunks, workers):
+        for grid, solution, rating in chunk:
+            yield GeneratedPuzzle(
+                SudokuGrid.from_line(grid), SudokuGrid.from_line(solution), rating
+            )
+
+
+def main() -> None:
+    """Main program"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", type=int, help="Number of puzzles")
+    parser.add_argument("puzzles", type=Path, help="File to write the puzzles")
+    parser.add_argument("--difficulty", type=Difficulty, choices=list(Difficulty))
+    parser.add_argument("--box-size", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    args = parser.parse_args()
+
+    with PuzzleWriter(args.puzzles) as writer:
+        writer.write_all(
+            puzzle.grid
+            for puzzle in generate_batch(
+                args.count,
+                args.difficulty,
+                args.box_size,
+                args.seed,
+                args.workers,
+                args.chunk_size,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Incremental state of a Sudoku puzzle being played.
+
+`SudokuGrid.__setitem__` scans the row, the column and the box of a cell to
+check every move, and the only way to know if a grid still has a solution is
+to solve it again. A `PlaySession` keeps the `ConstraintMasks` of the grid
+up to date as the moves are played and undone, so checking a move costs a few
+bitwise operations, and it keeps a solution that agrees with the moves, so the
+puzzle is only solved again when a move goes against it.
+
+Example:
+>>> session = PlaySession(SudokuGrid.from_line(line))
+>>> hint = session.hint()
+>>> session.play(hint.pos_y, hint.pos_x, hint.num)
+>>> session.is_solvable()
+True
+"""
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Literal
+
+from src.sudoku_solver.search_budget import SearchBudget
+from src.sudoku_solver.sudoku_solver_oop import ConstraintMasks, SudokuGame, SudokuGrid
+
+type Rule = Literal["naked_single", "hidden_single", "solution"]
+
+
+@dataclass(frozen=True)
+class Hint:
+    """
+    A number that can be placed next.
+
+    Attributes:
+        pos_y (int): Y coordinate of the cell.
+        pos_x (int): X coordinate of the cell.
+        num (int): Number of the cell.
+        rule (Rule): Why it goes there: the only candidate of the cell, the
+            only place of the number in a row, column or box, or only the
+            solution when no single is left.
+    """
+
+    pos_y: int
+    pos_x: int
+    num: int
+    rule: Rule
+
+
+class PlaySession:
+    """
+    A puzzle being played, with its moves and the candidates of its cells.
+
+    Attributes:
+        grid (SudokuGrid): The puzzle with the moves played, a copy of the
+            initial grid.
+        masks (ConstraintMasks): Used numbers of the grid, kept in sync.
+        moves (list[tuple[int, int, int]]): Cell, number and trail mark of
+            every move, in the order they were played.
+    """
+
+    def __init__(self, grid: SudokuGrid) -> None:
+        self.grid = grid.copy()
+        self.masks = ConstraintMasks(self.grid)
+        self.moves: list[tuple[int, int, int]] = []
+        # A solution that agrees with the grid, unless some moves go against it
+        self._solution: list[list[int]] | None = None
+        self._conflicts = 0
+
+    def candidates(self, pos_y: int, pos_x: int) -> list[int]:
+        """Numbers that can be placed in an empty cell."""
+        candidates = self.masks.candidates(pos_y, pos_x)
+        return [
+            num for num in range(1, len(self.grid) + 1) if candidates >> (num - 1) & 1
+        ]
+
+    def is_consistent(self, pos_y: int, pos_x: int, num: int) -> bool:
+        """
+        Detects in O(1) if a number can be played in a cell.
+
+        Args:
+            pos_y (int): Y coordinate
+            pos_x (int): X coordinate
+            num (int): Number to check
+        Returns:
+            bool: True if the cell is empty and the number is not used in its
+            row, column or box.
+        """
+        return not self.grid.data[pos_y][pos_x] and self.masks.can_place(
+            pos_y, pos_x, num
+        )
+
+    def play(self, pos_y: int, pos_x: int, num: int) -> None:
+        """
+        Place a number in an empty cell.
+
+        Raises:
+            ValueError: If the move is not consistent.
+        """
+        if not self.is_consistent(pos_y, pos_x, num):
+            raise ValueError(f"Value {num} cannot be set in ({pos_y}, {pos_x})")
+        mark = self.masks.mark()
+        self.masks.place(pos_y, pos_x, num)
+        self.moves.append((pos_y, pos_x, mark))
+        if self._solution is not None and self._solution[pos_y][pos_x] != num:
+            self._conflicts += 1
+
+    def undo(self) -> tuple[int, int, int]:
+        """
+        Undo the last move.
+
+        Returns:
+            tuple[int, int, int]: Cell and number of the move.
+        Raises:
+            IndexError: If there are no moves.
+        """
+        pos_y, pos_x, mark = self.moves.pop()
+        num = self.grid.data[pos_y][pos_x]
+        self.masks.undo(mark)
+        if self._solution is not None and self._solution[pos_y][pos_x] != num:
+            self._conflicts -= 1
+        return pos_y, pos_x, num
+
+    def erase(self, pos_y: int, pos_x: int) -> None:
+        """
+        Undo the move of a cell, keeping the moves played after it.
+
+        Raises:
+            ValueError: If the cell has no move, such as an initial number.
+        """
+        undone = []
+        while self.moves and self.moves[-1][:2] != (pos_y, pos_x):
+            undone.append(self.undo())
+        if not self.moves:
+            self._replay(undone)
+            raise ValueError(f"No move in ({pos_y}, {pos_x})")
+        self.undo()
+        self._replay(undone)
+
+    def _replay(self, undone: list[tuple[int, int, int]]) -> None:
+        for pos_y, pos_x, num in reversed(undone):
+            self.play(pos_y, pos_x, num)
+
+    def hint(self) -> Hint | None:
+        """
+        Next number that follows from the rules, without playing it.
+
+        Returns:
+            Hint | None: A naked single, else a hidden single, else the number
+            of the solution of the first empty cell. None if the grid is full
+            or has no solution.
+        """
+        masks, data = self.masks, self.grid.data
+        empty_cells = masks.empty_cells()
+        for pos_y, pos_x in empty_cells:
+            candidates = masks.candidates(pos_y, pos_x)
+            if candidates and not candidates & (candidates - 1):
+                return Hint(pos_y, pos_x, candidates.bit_length(), "naked_single")
+        cells = self.grid.geometry.cells
+        for unit in self.grid.geometry.units:
+            once = twice = 0
+            for cell in unit:
+                pos_y, pos_x = cells[cell]
+                if not data[pos_y][pos_x]:
+                    candidates = masks.candidates(pos_y, pos_x)
+                    twice |= once & candidates
+                    once |= candidates
+            if hidden := once & ~twice:
+                bit = hidden & -hidden
+                for cell in unit:
+                    pos_y, pos_x = cells[cell]
+                    if not data[pos_y][pos_x] and masks.candidates(pos_y, pos_x) & bit:
+                        return Hint(pos_y, pos_x, bit.bit_length(), "hidden_single")
+        if not empty_cells or not self.is_solvable():
+            return None
+        assert self._solution is not None
+        pos_y, pos_x = empty_cells[0]
+        return Hint(pos_y, pos_x, self._solution[pos_y][pos_x], "solution")
+
+    def is_solvable(self, budget: SearchBudget | None = None) -> bool:
+        """
+        Detects if the grid with the moves played still has a solution.
+
+        The puzzle is only solved again when a move goes against the last
+        solution found, otherwise it costs nothing.
+
+        Args:
+            budget (SearchBudget | None): Limits of the search, if needed.
+        Returns:
+            bool: True if there is a solution.
+        Raises:
+            SearchStopped: If the budget stops the search.
+        """
+        if self._solution is not None and not self._conflicts:
+            return True
+        sudoku = SudokuGame(
+            self.grid.copy(), method="bitmask", heuristic="mrv", propagate=True
+        )
+        with closing(sudoku.iter_solutions(budget)) as solutions:
+            solution = next(solutions, None)
+        if solution is None:
+            return False
+        self._solution = solution.data
+        self._conflicts = 0
+        return True
@@ -0,0 +1,156 @@
+"""Read and write files with many Sudoku puzzles.
+
+The compact format has one puzzle per line, with the 81 cells row by row and a
+"." or a 0 for every empty cell (see `SudokuGrid.from_line`). Empty lines and
+lines starting with "#" are ignored.
+
+The files are read lazily line by line and written in blocks of lines, so
+files with millions of puzzles are processed in constant memory.
+"""
+import re
+from pathlib import Path
+from string import digits
+from types import TracebackType
+from typing import Iterable, Iterator, Self
+
+from src.sudoku_solver.sudoku_solver_oop import SudokuGrid
+
+
+def read_puzzle_lines(path: Path) -> Iterator[tuple[int, str]]:
+    """
+    Read lazily the lines with puzzles of a file in the compact format,
+    without checking them.
+
+    Args:
+        path (Path): File with one puzzle per line.
+    Yields:
+        tuple[int, str]: Line number and line of every puzzle of the file.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for number, line in enumerate(file, start=1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            yield number, stripped
+
+
+def read_puzzles(path: Path) -> Iterator[SudokuGrid]:
+    """
+    Read lazily the puzzles of a file in the compact format.
+
+    Args:
+        path (Path): File with one puzzle per line.
+    Yields:
+        SudokuGrid: Every puzzle of the file.
+    Raises:
+        ValueError: If a line is not a valid grid, with its line number.
+    """
+    for number, line in read_puzzle_lines(path):
+        try:
+            yield SudokuGrid.from_line(line)
+        except ValueError as error:
+            raise ValueError(f"{path}:{number}: {error}") from error
+
+
+def read_drawn_texts(path: Path, box_size: int = 3) -> Iterator[str]:
+    """
+    Read lazily the rows of the puzzles of a file in the format of
+    `SudokuGame.save_results`, without checking them.
+
+    Every line with a number per column is a row of the current puzzle, the
+    rest of the lines are ignored. As in `SudokuGrid.from_string`, up to 9x9
+    every digit is a number and in bigger grids they are separated by spaces.
+
+    Args:
+        path (Path): File with the puzzles.
+        box_size (int): Rows and columns of every box.
+    Yields:
+        str: The rows of every puzzle of the file.
+    """
+    size = box_size * box_size
+    rows: list[str] = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if size <= 9:
+                numbers = sum(char in digits for char in line)
+            else:
+                numbers = len(re.findall(r"\d+", line))
+            if numbers == size:
+                rows.append(line)
+            if len(rows) == size:
+                yield "".join(rows)
+                rows.clear()
+
+
+def read_drawn_puzzles(path: Path, box_size: int = 3) -> Iterator[SudokuGrid]:
+    """
+    Read lazily the puzzles of a file in the format of `SudokuGame.save_results`.
+
+    Args:
+        path (Path): File with the puzzles.
+        box_size (int): Rows and columns of every box.
+    Yields:
+        SudokuGrid: Every puzzle of the file.
+    Raises:
+        ValueError: If a puzzle is not a valid grid.
+    """
+    for text in read_drawn_texts(path, box_size):
+        yield SudokuGrid.from_string(text, box_size)
+
+
+class PuzzleWriter:
+    """
+    Append grids to a file in the compact format.
+
+    The lines are kept in a buffer and written together every `buffer_size`
+    grids, and when the writer is closed.
+
+    Example:
+    >>> with PuzzleWriter(Path("solutions.txt")) as writer:
+    ...     writer.write_all(solutions)
+
+    Attributes:
+        path (Path): File where the grids are appended.
+        buffer_size (int): Number of grids kept before writing them.
+    """
+
+    def __init__(self, path: Path, buffer_size: int = 4096) -> None:
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer: list[str] = []
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def write(self, grid: SudokuGrid) -> None:
+        """Add a grid to the buffer, writing it when it is full."""
+        self._buffer.append(f"{grid.to_line()}\n")
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_all(self, grids: Iterable[SudokuGrid]) -> None:
+        """Add many grids to the buffer."""
+        for grid in grids:
+            self.write(grid)
+
+    def flush(self) -> None:
+        """Write the grids of the buffer to the file."""
+        self._file.writelines(self._buffer)
+        self._buffer.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """Write the grids left and close the file."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
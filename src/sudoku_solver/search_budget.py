@@ -0,0 +1,123 @@
+"""Limits of the work of a Sudoku search.
+
+A malformed or adversarial puzzle can keep a solver busy for minutes, so a
+search can be given a `SearchBudget` with a maximum number of nodes, a deadline
+and a `CancellationToken` that another thread can cancel. The solvers spend the
+budget at every node and the limits are checked every `check_every` nodes, so
+an unlimited search does not pay for them.
+
+Example:
+>>> budget = SearchBudget(max_nodes=100_000, timeout=1.0)
+>>> sudoku.solve(max_solutions=1, budget=budget)
+>>> sudoku.status
+<SolveStatus.BUDGET_EXHAUSTED: 'budget_exhausted'>
+"""
+import time
+from enum import StrEnum
+from threading import Event
+
+
+class SolveStatus(StrEnum):
+    """Result of a search"""
+
+    SOLVED = "solved"  # Found at least a solution
+    NO_SOLUTION = "no_solution"  # Searched the whole puzzle without solutions
+    BUDGET_EXHAUSTED = "budget_exhausted"  # Unsolved, it tried all its nodes
+    TIMED_OUT = "timed_out"  # Unsolved, it reached the deadline
+    CANCELLED = "cancelled"  # Unsolved, its token was cancelled
+
+
+class CancellationToken:
+    """
+    Flag to stop the searches that share it, from any thread.
+
+    Example:
+    >>> token = CancellationToken()
+    >>> threading.Timer(1.0, token.cancel).start()
+    >>> sudoku.solve(budget=SearchBudget(token=token))
+    """
+
+    def __init__(self) -> None:
+        self._event = Event()
+
+    def cancel(self) -> None:
+        """Ask the searches to stop at their next check."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """If `cancel` was called."""
+        return self._event.is_set()
+
+
+class SearchStopped(Exception):
+    """
+    The search was stopped by its budget before finishing.
+
+    Attributes:
+        status (SolveStatus): The limit that stopped it.
+    """
+
+    def __init__(self, status: SolveStatus) -> None:
+        super().__init__(f"Unsolved: {status.replace('_', ' ')}")
+        self.status = status
+
+
+class SearchBudget:
+    """
+    Nodes, time and cancellation allowed to a search.
+
+    Attributes:
+        max_nodes (int | None): Numbers that can be tried, unlimited if None.
+        deadline (float | None): Value of `time.monotonic` when the search must
+            stop, from the creation of the budget and `timeout` seconds.
+        token (CancellationToken | None): Cancels the search when it is
+            cancelled.
+        check_every (int): Nodes between the checks of the deadline and the
+            token.
+        nodes (int): Numbers tried so far.
+    """
+
+    def __init__(
+        self,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        token: CancellationToken | None = None,
+        check_every: int = 1024,
+    ) -> None:
+        self.max_nodes = max_nodes
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.token = token
+        self.check_every = check_every
+        self.nodes = 0
+        # The first node checks the limits
+        self._next_check = 1
+
+    def spend(self) -> None:
+        """
+        Count a node of the search.
+
+        Raises:
+            SearchStopped: If it is over `max_nodes`, or at a check after the
+                deadline or the cancellation.
+        """
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self.check()
+
+    def check(self) -> None:
+        """
+        Check all the limits now.
+
+        Raises:
+            SearchStopped: If any of the limits is reached.
+        """
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchStopped(SolveStatus.BUDGET_EXHAUSTED)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchStopped(SolveStatus.TIMED_OUT)
+        if self.token is not None and self.token.cancelled:
+            raise SearchStopped(SolveStatus.CANCELLED)
+        self._next_check = self.nodes + self.check_every
+        if self.max_nodes is not None:
+            self._next_check = min(self._next_check, self.max_nodes + 1)
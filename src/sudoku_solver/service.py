@@ -0,0 +1,332 @@
+"""Local HTTP/JSON service that solves Sudoku puzzles.
+
+An asyncio server accepts the puzzles in the compact format of `puzzle_io`,
+and a dispatcher groups the requests that arrive together in micro-batches,
+which are solved by a pool of worker processes, so the event loop never
+blocks and the processes stay warm between requests. The requests wait in a
+bounded queue: when it is full the service answers 503 instead of taking more
+work than it can do, and every puzzle has a `SearchBudget`, so a pathological
+one cannot stall a worker.
+
+Endpoints:
+- ``POST /solve`` with ``{"puzzle": "<compact line>", "max_solutions": 1}``
+  answers ``{"status": "solved", "solutions": ["<compact line>", ...]}``.
+- ``GET /health`` answers ``{"status": "ok", "queued": <requests waiting>}``.
+
+Usage:
+    python -m src.sudoku_solver.service --port 8080 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Self, Sequence
+
+from src.sudoku_solver.search_budget import SearchBudget
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+# Most solutions that a request can ask for
+MAX_SOLUTIONS = 100
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    503: "Service Unavailable",
+}
+
+
+class ServiceBusy(Exception):
+    """The queue of the service is full."""
+
+
+def solve_requests(
+    requests: Sequence[tuple[str, int]],
+    max_nodes: int | None = None,
+    timeout: float | None = None,
+) -> list[tuple[str, list[str]]]:
+    """
+    Solve a micro-batch of requests in a worker process.
+
+    Args:
+        requests (Sequence[tuple[str, int]]): Compact line of every puzzle and
+            the number of solutions requested.
+        max_nodes (int | None): Numbers tried in each puzzle before giving up.
+        timeout (float | None): Seconds spent in each puzzle before giving up.
+    Returns:
+        list[tuple[str, list[str]]]: The `SolveStatus` and the compact lines of
+        the solutions of every puzzle, or "invalid" and the error of a puzzle
+        that cannot be read.
+    """
+    results = []
+    for line, max_solutions in requests:
+        try:
+            sudoku = SudokuGame(
+                SudokuGrid.from_line(line),
+                method="bitmask",
+                heuristic="mrv",
+                propagate=True,
+            )
+        except ValueError as error:
+            results.append(("invalid", [str(error)]))
+            continue
+        solutions = sudoku.solve(max_solutions, SearchBudget(max_nodes, timeout))
+        results.append((str(sudoku.status), [grid.to_line() for grid in solutions]))
+    return results
+
+
+@dataclass
+class _Request:
+    """A puzzle waiting in the queue, and where its result is set."""
+
+    line: str
+    max_solutions: int
+    result: asyncio.Future[tuple[str, list[str]]] = field(repr=False)
+
+
+class SolverService:
+    """
+    Queue of puzzles solved in micro-batches by a pool of processes.
+
+    Example:
+    >>> async with SolverService(workers=4) as service:
+    ...     status, solutions = await service.solve(line)
+
+    Attributes:
+        workers (int): Number of processes, by default the number of CPUs.
+        batch_size (int): Most requests solved together by a process.
+        batch_delay (float): Seconds a batch waits for more requests after
+            the first one.
+        queue_size (int): Most requests waiting to be solved.
+        max_nodes (int | None): Node budget of every puzzle.
+        timeout (float | None): Seconds for every puzzle.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        batch_size: int = 32,
+        batch_delay: float = 0.002,
+        queue_size: int = 1024,
+        max_nodes: int | None = None,
+        timeout: float | None = 10.0,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.queue_size = queue_size
+        self.max_nodes = max_nodes
+        self.timeout = timeout
+        self._queue: asyncio.Queue[_Request] = asyncio.Queue(queue_size)
+        self._executor: ProcessPoolExecutor | None = None
+        self._dispatcher: asyncio.Task[None] | None = None
+        self._batches: set[asyncio.Task[None]] = set()
+
+    async def __aenter__(self) -> Self:
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    @property
+    def queued(self) -> int:
+        """Requests waiting to be sent to a process."""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start the processes and the dispatcher of the batches."""
+        # Forked processes would keep open the sockets of the connections
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def close(self) -> None:
+        """Stop the dispatcher, cancel the waiting requests and the processes."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        for task in list(self._batches):
+            task.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait().result.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def solve(self, line: str, max_solutions: int = 1) -> tuple[str, list[str]]:
+        """
+        Solve a puzzle in the next batch.
+
+        Args:
+            line (str): Compact line of the puzzle.
+            max_solutions (int): Maximum number of solutions to find.
+        Returns:
+            tuple[str, list[str]]: As every result of `solve_requests`.
+        Raises:
+            ServiceBusy: If the queue is full.
+        """
+        result: asyncio.Future[
+            tuple[str, list[str]]
+        ] = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_Request(line, max_solutions, result))
+        except asyncio.QueueFull as error:
+            raise ServiceBusy(
+                f"More than {self.queue_size} requests waiting"
+            ) from error
+        return await result
+
+    async def _dispatch(self) -> None:
+        """Group the queued requests in batches and send them to the processes."""
+        # A batch for every process, the next ones wait in the queue
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            batch = [await self._queue.get()]
+            # Wait a little for the requests that arrive together
+            deadline = asyncio.get_running_loop().time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+            await slots.acquire()
+            task = asyncio.create_task(self._solve_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _solve_batch(self, batch: list[_Request]) -> None:
+        """Solve a batch in a process and set the result of every request."""
+        requests = [(request.line, request.max_solutions) for request in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, solve_requests, requests, self.max_nodes, self.timeout
+            )
+            for request, result in zip(batch, results):
+                # The client may have stopped waiting for it
+                if not request.result.done():
+                    request.result.set_result(result)
+        except Exception as error:  # pylint: disable=broad-except
+            for request in batch:
+                if not request.result.done():
+                    request.result.set_exception(error)
+        finally:
+            # Also when the service is closed while solving the batch
+            for request in batch:
+                request.result.cancel()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer a HTTP request of a connection, and close it."""
+        try:
+            code, body = await self._answer(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            code, body = 400, {"error": "Malformed HTTP request"}
+        data = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {code} {REASONS[code]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode() + data
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(
+        self, reader: asyncio.StreamReader, max_body: int = 65536
+    ) -> tuple[int, dict[str, Any]]:
+        """Status code and JSON body of the answer to a HTTP request."""
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise ValueError("Malformed request line")
+        method, path, _ = request_line
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if path == "/health":
+            return 200, {"status": "ok", "queued": self.queued}
+        if path != "/solve":
+            return 404, {"error": f"Unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST to solve a puzzle"}
+        length = int(headers.get("content-length", 0))
+        if length > max_body:
+            return 413, {"error": f"Bodies are up to {max_body} bytes"}
+        try:
+            request = json.loads(await reader.readexactly(length))
+            line = request["puzzle"]
+            max_solutions = int(request.get("max_solutions", 1))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return 400, {"error": 'Expected {"puzzle": "<compact line>"}'}
+        if not isinstance(line, str) or not 1 <= max_solutions <= MAX_SOLUTIONS:
+            return 400, {"error": f"max_solutions must be from 1 to {MAX_SOLUTIONS}"}
+        try:
+            status, solutions = await self.solve(line, max_solutions)
+        except ServiceBusy as error:
+            return 503, {"error": str(error)}
+        if status == "invalid":
+            return 400, {"error": solutions[0]}
+        return 200, {"status": status, "solutions": solutions}
+
+
+async def serve(host: str, port: int, service: SolverService) -> None:
+    """Serve the requests until the task is cancelled."""
+    async with service:
+        server = await asyncio.start_server(service.handle, host, port)
+        async with server:
+            print(f"Serving on http://{host}:{port}")
+            await server.serve_forever()
+
+
+def main() -> None:
+    """Main program"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queue-size", type=int, default=1024)
+    parser.add_argument("--max-nodes", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    service = SolverService(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        max_nodes=args.max_nodes,
+        timeout=args.timeout,
+    )
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Cache of Sudoku solutions keyed by the canonical form of the puzzles.
+
+Relabeling the numbers, swapping the bands, the stacks, the rows of a band or
+the columns of a stack, and transposing a grid give a different puzzle with
+the same solutions moved in the same way. `canonical_form` moves every puzzle
+to a representative of those variants, so their solutions are only searched
+once and moved back to the orientation of every variant.
+
+The rows and the columns are ordered by invariants that do not depend on their
+position, refined from the numbers they share. The variants of a puzzle with
+symmetries, where some rows or columns cannot be told apart, may still have
+more than one canonical form, which only costs a miss of the cache.
+
+Example:
+>>> with SolutionCache(Path("solutions.sqlite")) as cache:
+...     SudokuGame(grid, method="dlx", cache=cache).solve(max_solutions=1)
+"""
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from types import TracebackType
+from typing import Self, Sequence
+
+
+@dataclass(frozen=True)
+class Canonical:
+    """
+    Transformation of a grid to its canonical form.
+
+    Attributes:
+        form (bytes): Numbers of the canonical grid, row by row, 0 if empty.
+        transposed (bool): If the grid is transposed before ordering it.
+        rows (tuple[int, ...]): Row of the transposed or not grid that is
+            moved to every row of the canonical form.
+        cols (tuple[int, ...]): Column of that grid that is moved to every
+            column of the canonical form.
+        labels (tuple[int, ...]): Number of the canonical form of every number
+            of the grid, with 0 for the empty cells.
+    """
+
+    form: bytes
+    transposed: bool
+    rows: tuple[int, ...]
+    cols: tuple[int, ...]
+    labels: tuple[int, ...]
+
+    def to_canonical(self, grid: Sequence[Sequence[int]]) -> bytes:
+        """
+        Move a grid of the same orientation, such as a solution, to the
+        canonical orientation.
+        """
+        labels = self.labels
+        if self.transposed:
+            return bytes(
+                labels[grid[col][row]] for row in self.rows for col in self.cols
+            )
+        return bytes(labels[grid[row][col]] for row in self.rows for col in self.cols)
+
+    def from_canonical(self, form: bytes) -> list[list[int]]:
+        """Move a grid of the canonical orientation back to this orientation."""
+        size = len(self.rows)
+        numbers = [0] * len(self.labels)
+        for num, label in enumerate(self.labels):
+            numbers[label] = num
+        grid = [[0] * size for _ in range(size)]
+        for index, row in enumerate(self.rows):
+            start = index * size
+            for col, label in zip(self.cols, form[start : start + size]):
+                if self.transposed:
+                    grid[col][row] = numbers[label]
+                else:
+                    grid[row][col] = numbers[label]
+        return grid
+
+
+def canonical_form(grid: Sequence[Sequence[int]], box_size: int = 3) -> Canonical:
+    """
+    Canonical form of a grid, the same for most of its equivalent variants.
+
+    Example:
+    >>> canonical = canonical_form(sudoku.grid.data)
+    >>> canonical.from_canonical(canonical.form) == sudoku.grid.data
+    True
+
+    Args:
+        grid (Sequence[Sequence[int]]): Rows of the grid, 0 for the empty cells.
+        box_size (int): Rows and columns of every box.
+    Returns:
+        Canonical: The smallest of the forms of the grid and its transpose.
+    """
+    transposed = [list(col) for col in zip(*grid)]
+    return min(
+        _arrange(grid, box_size, False),
+        _arrange(transposed, box_size, True),
+        key=lambda canonical: canonical.form,
+    )
+
+
+def _arrange(
+    grid: Sequence[Sequence[int]], box_size: int, transposed: bool
+) -> Canonical:
+    """Order and relabel a grid by the invariants of its rows and columns."""
+    size = box_size * box_size
+    row_colors, col_colors = _refine_colors(grid, size)
+    rows = _order(row_colors, box_size)
+    cols = _order(col_colors, box_size)
+    # Number the labels as they appear in the new order
+    labels = [0] * (size + 1)
+    next_label = 1
+    for row in rows:
+        for col in cols:
+            num = grid[row][col]
+            if num and not labels[num]:
+                labels[num] = next_label
+                next_label += 1
+    for num in range(1, size + 1):
+        if not labels[num]:
+            labels[num] = next_label
+            next_label += 1
+    form = bytes(labels[grid[row][col]] for row in rows for col in cols)
+    return Canonical(form, transposed, tuple(rows), tuple(cols), tuple(labels))
+
+
+def _refine_colors(
+    grid: Sequence[Sequence[int]], size: int, rounds: int = 3
+) -> tuple[list[int], list[int]]:
+    """
+    Colors of the rows and the columns that do not depend on their order nor
+    on the labels of the numbers.
+
+    Every round the color of a row is made from the colors of the columns and
+    the numbers of its clues, and so on, which tells apart most of the rows and
+    columns of a puzzle without symmetries.
+    """
+    clues = [
+        (row, col, num)
+        for row, line in enumerate(grid)
+        for col, num in enumerate(line)
+        if num
+    ]
+    row_colors, col_colors, num_colors = [0] * size, [0] * size, [0] * (size + 1)
+    for _ in range(rounds):
+        row_keys: list[list[tuple[int, int]]] = [[] for _ in range(size)]
+        col_keys: list[list[tuple[int, int]]] = [[] for _ in range(size)]
+        num_keys: list[list[tuple[int, int]]] = [[] for _ in range(size + 1)]
+        for row, col, num in clues:
+            row_keys[row].append((col_colors[col], num_colors[num]))
+            col_keys[col].append((row_colors[row], num_colors[num]))
+            num_keys[num].append((row_colors[row], col_colors[col]))
+        row_colors = _ranks(row_keys)
+        col_colors = _ranks(col_keys)
+        num_colors = _ranks(num_keys)
+    return row_colors, col_colors
+
+
+def _ranks(keys: list[list[tuple[int, int]]]) -> list[int]:
+    """Position of every key among the different keys, once sorted."""
+    sorted_keys = [sorted(key) for key in keys]
+    ranks = {key: rank for rank, key in enumerate(sorted(set(map(tuple, sorted_keys))))}
+    return [ranks[tuple(key)] for key in sorted_keys]
+
+
+def _order(colors: list[int], box_size: int) -> list[int]:
+    """
+    Rows or columns sorted by color, keeping every band or stack together.
+
+    The ties are left in their order, as they cannot be told apart.
+    """
+    blocks = [
+        sorted(range(start, start + box_size), key=colors.__getitem__)
+        for start in range(0, box_size * box_size, box_size)
+    ]
+    blocks.sort(key=lambda block: [colors[index] for index in block])
+    return [index for block in blocks for index in block]
+
+
+class SolutionCache:
+    """
+    Solutions of the canonical forms, kept in memory and optionally in a
+    SQLite database that lasts between runs.
+
+    The most recently used entries are kept in memory, up to `maxsize`. Every
+    entry has the solutions found and if they are all the solutions of the
+    puzzle, so a request of more solutions than an incomplete entry has is
+    searched again. It can be shared by the threads of a process.
+
+    Attributes:
+        path (Path | None): Database of the solutions, None to only keep them
+            in memory.
+        maxsize (int): Number of entries kept in memory.
+    """
+
+    def __init__(self, path: Path | None = None, maxsize: int = 4096) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self._memory: OrderedDict[bytes, tuple[list[bytes], bool]] = OrderedDict()
+        self._lock = Lock()
+        self._connection: sqlite3.Connection | None = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS solutions"
+                    " (form BLOB PRIMARY KEY, solutions BLOB, complete INTEGER)"
+                )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of entries kept in memory."""
+        return len(self._memory)
+
+    def get(self, form: bytes, max_solutions: int | None = None) -> list[bytes] | None:
+        """
+        Cached solutions of a canonical form.
+
+        Args:
+            form (bytes): The canonical form of the puzzle.
+            max_solutions (int | None): Maximum number of solutions needed.
+                If None all the solutions are needed.
+        Returns:
+            list[bytes] | None: Up to `max_solutions` solutions in the canonical
+            orientation, or None if the cache does not have enough of them.
+        """
+        with self._lock:
+            entry = self._memory.get(form)
+            if entry is not None:
+                self._memory.move_to_end(form)
+            elif self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT solutions, complete FROM solutions WHERE form = ?",
+                    (form,),
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = _split(row[0], len(form)), bool(row[1])
+                self._remember(form, entry)
+            else:
+                return None
+        solutions, complete = entry
+        if complete or (max_solutions is not None and len(solutions) >= max_solutions):
+            return solutions[:max_solutions]
+        return None
+
+    def put(self, form: bytes, solutions: list[bytes], complete: bool) -> None:
+        """
+        Keep the solutions of a canonical form.
+
+        Args:
+            form (bytes): The canonical form of the puzzle.
+            solutions (list[bytes]): Solutions in the canonical orientation.
+            complete (bool): If they are all the solutions of the puzzle.
+        """
+        with self._lock:
+            self._remember(form, (solutions, complete))
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                        (form, b"".join(solutions), complete),
+                    )
+
+    def close(self) -> None:
+        """Close the database, the entries in memory are kept."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _remember(self, form: bytes, entry: tuple[list[bytes], bool]) -> None:
+        """Keep an entry in memory, forgetting the least recently used."""
+        self._memory[form] = entry
+        self._memory.move_to_end(form)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+
+def _split(solutions: bytes, size: int) -> list[bytes]:
+    """The solutions stored together in the database."""
+    return [solutions[start : start + size] for start in range(0, len(solutions), size)]
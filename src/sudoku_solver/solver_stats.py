@@ -0,0 +1,35 @@
+"""Counters of the work done by the Sudoku solvers.
+
+They are only collected when they are requested, for example with
+``SudokuGame(grid, collect_stats=True)``, so the searches do not pay for them
+otherwise.
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class SolverStats:
+    """
+    Counters of a search.
+
+    Attributes:
+        nodes (int): Numbers tried in a cell by the search.
+        backtracks (int): Cells left after trying all their candidates.
+        max_depth (int): Most cells being tried at the same time.
+        propagations (int): Numbers placed and candidates removed by
+            `ConstraintMasks.propagate`.
+    """
+
+    nodes: int = 0
+    backtracks: int = 0
+    max_depth: int = 0
+    propagations: int = 0
+
+    def __add__(self, other: "SolverStats") -> "SolverStats":
+        """Counters of two searches, with the deepest of both."""
+        return SolverStats(
+            self.nodes + other.nodes,
+            self.backtracks + other.backtracks,
+            max(self.max_depth, other.max_depth),
+            self.propagations + other.propagations,
+        )
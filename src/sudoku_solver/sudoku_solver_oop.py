@@ -5,36 +5,167 @@ provides methods to solve the puzzle using backtracking. The Sudoku class
 stores the initial grid and provides a string representation of the puzzle.
 
 Note: The Sudoku puzzle is represented as a 9x9 grid, where 0 represents an empty cell.
+Grids of other box sizes, such as 4x4, 16x16 and 25x25, are also supported.
 
 For more details, please refer to the inline comments in the code.
 """
 # %%
+import re
 from collections import UserList
-from itertools import chain
-from typing import Any, Sequence, SupportsIndex, overload
+from contextlib import closing
+from functools import cache
+from itertools import chain, islice
+from math import isqrt
+from string import digits
+from typing import Any, Iterator, Literal, Sequence, SupportsIndex, overload
+
+from src.sudoku_solver.dancing_links import dancing_links
+from src.sudoku_solver.search_budget import SearchBudget, SearchStopped, SolveStatus
+from src.sudoku_solver.solution_cache import SolutionCache, canonical_form
+from src.sudoku_solver.solver_stats import SolverStats
+
+type Method = Literal["backtracking", "bitmask", "dlx"]
+METHODS: tuple[Method, ...] = ("backtracking", "bitmask", "dlx")
+type Heuristic = Literal["row_major", "mrv", "mrv_degree"]
+HEURISTICS: tuple[Heuristic, ...] = ("row_major", "mrv", "mrv_degree")
+
+# Symbols of the numbers in the compact format, so 25x25 grids fit one per cell
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+
+class Geometry:
+    """
+    Tables of the relations between the cells of a grid with boxes of a size,
+    computed once for all the grids of that size.
+
+    A grid with boxes of ``box_size x box_size`` cells has ``size = box_size**2``
+    rows, columns, boxes and numbers. A cell is identified by its index
+    ``row * size + column``.
+
+    Example:
+    >>> geometry(2).peers[0]
+    (1, 2, 3, 4, 5, 8, 12)
+
+    Attributes:
+        box_size (int): Rows and columns of every box.
+        size (int): Rows and columns of the grid, and the highest number.
+        full_mask (int): Bitmask with a bit for every number.
+        cells (tuple[tuple[int, int], ...]): Coordinates (row, column) of every cell.
+        box_of (tuple[int, ...]): Box (row-major) of every cell.
+        units (tuple[tuple[int, ...], ...]): The rows, the columns and the boxes,
+            in that order, as the cells of each one.
+        units_of (tuple[tuple[int, int, int], ...]): Indexes in `units` of the
+            row, the column and the box of every cell.
+        peers (tuple[tuple[int, ...], ...]): The cells that share a row, column
+            or box with every cell.
+        drawn_grid (str): Template of `SudokuGrid.__str__` with a field per cell.
+    """
+
+    def __init__(self, box_size: int) -> None:
+        if box_size < 1:
+            raise ValueError(f"Invalid box size {box_size}")
+        self.box_size = box_size
+        self.size = size = box_size * box_size
+        self.full_mask = (1 << size) - 1
+        self.cells = tuple(
+            (pos_y, pos_x) for pos_y in range(size) for pos_x in range(size)
+        )
+        self.box_of = tuple(
+            (pos_y // box_size) * box_size + pos_x // box_size
+            for pos_y, pos_x in self.cells
+        )
+        cells = range(size * size)
+        self.units = (
+            *(
+                tuple(cell for cell in cells if cell // size == row)
+                for row in range(size)
+            ),
+            *(
+                tuple(cell for cell in cells if cell % size == col)
+                for col in range(size)
+            ),
+            *(
+                tuple(cell for cell in cells if self.box_of[cell] == box)
+                for box in range(size)
+            ),
+        )
+        self.units_of = tuple(
+            (pos_y, size + pos_x, 2 * size + self.box_of[cell])
+            for cell, (pos_y, pos_x) in enumerate(self.cells)
+        )
+        self.peers = tuple(
+            tuple(
+                sorted(
+                    {
+                        peer
+                        for unit in self.units_of[cell]
+                        for peer in self.units[unit]
+                        if peer != cell
+                    }
+                )
+            )
+            for cell in cells
+        )
+        self.drawn_grid = self._drawn_grid()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.box_size})"
+
+    def _drawn_grid(self) -> str:
+        """Template of the rows with the boxes separated by lines."""
+        width = len(str(self.size))
+        field = "{}" if width == 1 else f"{{:>{width}}}"
+        box = " ".join([field] * self.box_size)
+        row = "  |  ".join([box] * self.box_size)
+        # Every box is as wide as its numbers with the spaces between them
+        dashes = "-" * (self.box_size * (width + 1) + 1)
+        line = " + ".join([dashes] * self.box_size)[1:-1]
+        band = "\n".join([row] * self.box_size)
+        return f"\n{line}\n".join([band] * self.box_size)
+
+
+@cache
+def geometry(box_size: int = 3) -> Geometry:
+    """The shared tables of the grids with boxes of a size."""
+    return Geometry(box_size)
+
+
+def box_size_of(size: int) -> int:
+    """
+    Size of the boxes of a grid with a number of rows.
+
+    Raises:
+        ValueError: If the rows are not a perfect square.
+    """
+    box_size = isqrt(size)
+    if size < 1 or box_size * box_size != size:
+        raise ValueError(f"A grid of {size} rows has no square boxes")
+    return box_size
+
+
+# Tables of the standard 9x9 grid
+STANDARD = geometry(3)
+PEERS = STANDARD.peers
 
 
 class SudokuGrid(UserList[list[int]]):
     """
-    A 9x9 grid representing the Sudoku puzzle.
+    A grid representing the Sudoku puzzle, 9x9 unless other box size is given.
+
+    Attributes:
+        geometry (Geometry): Tables of the cells of the grid size.
     """
 
-    drawn_grid: str = """\
-0 0 0  |  0 0 0  |  0 0 0
-0 0 0  |  0 0 0  |  0 0 0
-0 0 0  |  0 0 0  |  0 0 0
------- + ------- + ------
-0 0 0  |  0 0 0  |  0 0 0
-0 0 0  |  0 0 0  |  0 0 0
-0 0 0  |  0 0 0  |  0 0 0
------- + ------- + ------
-0 0 0  |  0 0 0  |  0 0 0
-0 0 0  |  0 0 0  |  0 0 0
-0 0 0  |  0 0 0  |  0 0 0""".replace(
-        "0", "{}"
-    )
-
-    def __init__(self, grid: Sequence[list[int]]) -> None:
+    def __init__(self, grid: Sequence[list[int]], box_size: int | None = None) -> None:
+        """
+        Args:
+            grid (Sequence[list[int]]): Rows of the grid, 0 for empty cells.
+            box_size (int | None): Rows and columns of every box, by default
+                the square root of the number of rows.
+        Raises:
+            ValueError: If the grid is not valid for the box size.
+        """
+        self.geometry = geometry(box_size or box_size_of(len(grid)))
         if not self._is_valid_grid(grid):
             raise ValueError("Invalid grid")
         super().__init__(grid)
@@ -67,6 +198,16 @@ class SudokuGrid(UserList[list[int]]):
         """
         return self.drawn_grid.format(*chain.from_iterable(self))
 
+    @property
+    def drawn_grid(self) -> str:
+        """Template of `__str__` for the size of the grid."""
+        return self.geometry.drawn_grid
+
+    @property
+    def box_size(self) -> int:
+        """Rows and columns of every box."""
+        return self.geometry.box_size
+
     @overload
     def __getitem__(self, index: slice) -> list[list[int]]:
         ...
@@ -102,15 +243,28 @@ class SudokuGrid(UserList[list[int]]):
                 raise TypeError("Invalid key type")
 
     def _is_valid_grid(self, grid: Sequence[Sequence[Any]]) -> bool:
-        if len(grid) != 9:
+        size = self.geometry.size
+        if len(grid) != size:
+            return False
+        if any(len(row) != size for row in grid):
             return False
-        if any(len(row) != 9 for row in grid):
+        if not all(self._is_valid_value(value) for row in grid for value in row):
             return False
-        return all(self._is_valid_value(value) for row in grid for value in row)
+        return not self._has_repeated_numbers(grid)
 
     def _is_valid_value(self, value: Any) -> bool:
         num = int(value)
-        return 0 <= num <= 9
+        return 0 <= num <= self.geometry.size
+
+    def _has_repeated_numbers(self, grid: Sequence[Sequence[Any]]) -> bool:
+        """Detects a number repeated in a row, column or box of the grid."""
+        cells = self.geometry.cells
+        for unit in self.geometry.units:
+            numbers = [int(grid[cells[cell][0]][cells[cell][1]]) for cell in unit]
+            numbers = [num for num in numbers if num]
+            if len(numbers) != len(set(numbers)):
+                return True
+        return False
 
     def can_set_in(self, pos_y: int, pos_x: int, num: int) -> bool:
         """
@@ -125,27 +279,482 @@ class SudokuGrid(UserList[list[int]]):
             bool: True if the number can be placed in the Sudoku puzzle,
             False otherwise.
         """
-        # Check if there are no matches in the row
-        if num in self.data[pos_y]:
+        data = self.data
+        cells = self.geometry.cells
+        # Check the cell and the cells of its row, column and box
+        if data[pos_y][pos_x] == num:
             return False
-
-        # Check if there are no matches in the column
-        for row in self.data:
-            if row[pos_x] == num:
-                return False
-
-        # Check in which of the 9 boxes the cell is located
-        quadrant_y = (pos_y // 3) * 3
-        quadrant_x = (pos_x // 3) * 3
-        # Check if there are no matches in the box
-        for row in self.data[quadrant_y : quadrant_y + 3]:
-            if num in row[quadrant_x : quadrant_x + 3]:
+        for peer in self.geometry.peers[pos_y * self.geometry.size + pos_x]:
+            peer_y, peer_x = cells[peer]
+            if data[peer_y][peer_x] == num:
                 return False
         # If no condition is met, then it is possible
         return True
 
     def copy(self):
-        return self.__class__([row[:] for row in self.data])
+        return self.__class__([row[:] for row in self.data], self.box_size)
+
+    @classmethod
+    def from_string(cls, text: str, box_size: int = 3) -> "SudokuGrid":
+        """
+        Create a grid from its drawn representation, as written by `__str__`.
+
+        Only the numbers of the text are read, so the separators of the boxes
+        and any other characters are ignored. Up to 9x9 every digit is a
+        number, in bigger grids the numbers are separated by spaces.
+
+        Args:
+            text (str): Text with the numbers of the grid, 0 for empty cells.
+            box_size (int): Rows and columns of every box.
+        Returns:
+            SudokuGrid: The grid of the text.
+        Raises:
+            ValueError: If the text does not have a number for every cell.
+        """
+        size = box_size * box_size
+        if size <= 9:
+            numbers = [int(char) for char in text if char in digits]
+        else:
+            numbers = [int(number) for number in re.findall(r"\d+", text)]
+        if len(numbers) != size * size:
+            raise ValueError(f"Expected {size * size} numbers, found {len(numbers)}")
+        return cls(
+            [numbers[row : row + size] for row in range(0, size * size, size)],
+            box_size,
+        )
+
+    @classmethod
+    def from_line(cls, line: str) -> "SudokuGrid":
+        """
+        Create a grid from the compact format of `to_line`.
+
+        Example:
+        >>> SudokuGrid.from_line("..3.2.6..9..3.5..1..18.64....81.29..7.......8"
+        ...                      "..67.82....26.95..8..2.3..9..5.1.3..")
+
+        Args:
+            line (str): The cells of the grid row by row, where an empty cell
+                is a "." or a 0. Surrounding whitespace is ignored. The size
+                of the grid is taken from the length of the line: 16, 81, 256
+                or 625 cells, with the numbers over 9 written as letters.
+        Returns:
+            SudokuGrid: The grid of the line.
+        Raises:
+            ValueError: If the line is not a valid grid.
+        """
+        line = line.strip()
+        size = isqrt(len(line))
+        if size * size != len(line) or not 1 < size <= len(SYMBOLS):
+            raise ValueError(f"Invalid number of cells {len(line)}")
+        numbers = []
+        for char in line:
+            num = 0 if char in ".0" else SYMBOLS.find(char.upper(), 0, size) + 1
+            if not num and char not in ".0":
+                raise ValueError(f"Invalid cell {char!r} in a {size}x{size} grid")
+            numbers.append(num)
+        return cls([numbers[row : row + size] for row in range(0, len(line), size)])
+
+    def to_line(self) -> str:
+        """
+        Compact format of the grid: all the cells in a single line, row by row,
+        with a "." for every empty cell and letters for the numbers over 9.
+        """
+        return "".join(
+            SYMBOLS[num - 1] if num else "." for row in self.data for num in row
+        )
+
+
+class FlatSudokuGrid:
+    """
+    A 9x9 grid stored in a single array of 81 bytes, row by row.
+
+    It has the same public interface as `SudokuGrid`, but a grid takes a small
+    fraction of the memory of 9 lists of integers, `copy` is a single copy of
+    the bytes, and `can_set_in` only checks the 20 `PEERS` of the cell.
+
+    Attributes:
+        cells (bytearray): The 81 numbers of the grid, 0 for empty cells.
+    """
+
+    __slots__ = ("cells",)
+
+    drawn_grid: str = STANDARD.drawn_grid
+
+    def __init__(self, grid: Sequence[Sequence[int]] | bytes | bytearray) -> None:
+        if isinstance(grid, (bytes, bytearray)):
+            cells = bytearray(grid)
+        elif len(grid) == 9 and all(len(row) == 9 for row in grid):
+            try:
+                cells = bytearray(int(num) for row in grid for num in row)
+            except ValueError as error:
+                raise ValueError("Invalid grid") from error
+        else:
+            raise ValueError("Invalid grid")
+        if not self._is_valid_cells(cells):
+            raise ValueError("Invalid grid")
+        self.cells = cells
+
+    @staticmethod
+    def _is_valid_cells(cells: bytearray) -> bool:
+        if len(cells) != 81 or max(cells) > 9:
+            return False
+        # No number can be repeated in a row, column or box
+        return not any(
+            num and any(cells[peer] == num for peer in PEERS[cell])
+            for cell, num in enumerate(cells)
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({bytes(self.cells)!r})"
+
+    def __str__(self) -> str:
+        """
+        String representation of the Sudoku puzzle, as `SudokuGrid.__str__`.
+        """
+        return self.drawn_grid.format(*self.cells)
+
+    def __len__(self) -> int:
+        return 9
+
+    def __iter__(self) -> Iterator[list[int]]:
+        cells = self.cells
+        for start in range(0, 81, 9):
+            yield list(cells[start : start + 9])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FlatSudokuGrid):
+            return self.cells == other.cells
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    @overload
+    def __getitem__(self, index: SupportsIndex) -> list[int]:
+        ...
+
+    @overload
+    def __getitem__(self, index: tuple[SupportsIndex, SupportsIndex]) -> int:
+        ...
+
+    def __getitem__(self, index):
+        match index:
+            case index if isinstance(index, SupportsIndex):
+                start = range(0, 81, 9)[index]
+                return list(self.cells[start : start + 9])
+            case y, x if all(isinstance(index, int) for index in index):
+                return self.cells[self._cell(y, x)]
+            case _:
+                raise TypeError("Invalid key type")
+
+    def __setitem__(self, key: tuple[SupportsIndex, SupportsIndex], value: Any) -> None:
+        match key:
+            case y, x if all(isinstance(index, int) for index in key):
+                if not 0 <= value <= 9:
+                    raise ValueError(f"Value {value} is not a valid number")
+                if value != 0 and not self.can_set_in(y, x, value):  # type: ignore
+                    raise ValueError(f"Value {value} cannot be set")
+                self.cells[self._cell(y, x)] = value  # type: ignore
+            case y, x if any(isinstance(index, slice) for index in key):
+                raise TypeError("Set an item using slicing is not supported")
+            case _:
+                raise TypeError("Invalid key type")
+
+    @staticmethod
+    def _cell(pos_y: int, pos_x: int) -> int:
+        """Index of a cell, counting the negative coordinates from the end."""
+        if not (-9 <= pos_y < 9 and -9 <= pos_x < 9):
+            raise IndexError("Grid index out of range")
+        return pos_y % 9 * 9 + pos_x % 9
+
+    def can_set_in(self, pos_y: int, pos_x: int, num: int) -> bool:
+        """
+        Detects if a number can be placed in the Sudoku puzzle by checking
+        the cell and the cells that share a row, column or box with it.
+
+        Args:
+            pos_y (int): Y coordinate
+            pos_x (int): X coordinate
+            num (int): Number to check
+        Returns:
+            bool: True if the number can be placed in the Sudoku puzzle,
+            False otherwise.
+        """
+        cells = self.cells
+        cell = self._cell(pos_y, pos_x)
+        return cells[cell] != num and all(cells[peer] != num for peer in PEERS[cell])
+
+    def copy(self) -> "FlatSudokuGrid":
+        """Copy of the grid, without validating it again."""
+        new = self.__class__.__new__(self.__class__)
+        new.cells = self.cells[:]
+        return new
+
+    @classmethod
+    def from_line(cls, line: str) -> "FlatSudokuGrid":
+        """Create a grid from the compact format of `SudokuGrid.from_line`."""
+        line = line.strip()
+        if len(line) != 81:
+            raise ValueError(f"Expected 81 cells, found {len(line)}")
+        try:
+            return cls(bytes(0 if char == "." else int(char) for char in line))
+        except ValueError as error:
+            raise ValueError(f"Invalid line {line!r}") from error
+
+    def to_line(self) -> str:
+        """Compact format of the grid, as `SudokuGrid.to_line`."""
+        return "".join(str(num) if num else "." for num in self.cells)
+
+    def to_grid(self) -> SudokuGrid:
+        """The same grid as a `SudokuGrid`."""
+        return SudokuGrid(list(self))
+
+
+class ConstraintMasks:
+    """
+    Bitmasks of the numbers already used in each row, column and box of a grid.
+
+    The number ``num`` is stored in the bit ``num - 1``, so checking if a number
+    can be placed in a cell costs a few bitwise operations instead of scanning
+    the row, the column and the box of the grid. The masks are updated
+    incrementally every time a number is placed or removed.
+
+    Every placement and every candidate removed by `propagate` is written in a
+    trail, so a search can take a `mark` and `undo` all the changes made after it.
+
+    Attributes:
+        grid (SudokuGrid): The grid that is kept in sync with the masks.
+        geometry (Geometry): Tables of the cells of the grid size.
+        full_mask (int): Mask with the bits of all the numbers.
+        rows (list[int]): Used numbers of each row.
+        columns (list[int]): Used numbers of each column.
+        boxes (list[int]): Used numbers of each box.
+        eliminated (list[list[int]]): Numbers removed from each cell by logic.
+        trail (list[tuple[int, int, int | None]]): Changes that can be undone.
+    """
+
+    def __init__(self, grid: SudokuGrid) -> None:
+        self.grid = grid
+        self.geometry = grid.geometry
+        self.full_mask = self.geometry.full_mask
+        size = self._size = self.geometry.size
+        self._box_of = self.geometry.box_of
+        self.rows = [0] * size
+        self.columns = [0] * size
+        self.boxes = [0] * size
+        self.eliminated = [[0] * size for _ in range(size)]
+        self.trail: list[tuple[int, int, int | None]] = []
+        for pos_y, row in enumerate(grid.data):
+            for pos_x, num in enumerate(row):
+                if num:
+                    self._mark(pos_y, pos_x, 1 << (num - 1))
+
+    def _mark(self, pos_y: int, pos_x: int, bit: int) -> None:
+        self.rows[pos_y] |= bit
+        self.columns[pos_x] |= bit
+        self.boxes[self._box_of[pos_y * self._size + pos_x]] |= bit
+
+    def candidates(self, pos_y: int, pos_x: int) -> int:
+        """
+        Bitmask of the numbers that can be placed in a cell.
+
+        Args:
+            pos_y (int): Y coordinate
+            pos_x (int): X coordinate
+        Returns:
+            int: Mask where the bit ``num - 1`` is set if ``num`` is allowed.
+        """
+        used = (
+            self.rows[pos_y]
+            | self.columns[pos_x]
+            | self.boxes[self._box_of[pos_y * self._size + pos_x]]
+            | self.eliminated[pos_y][pos_x]
+        )
+        return ~used & self.full_mask
+
+    def can_place(self, pos_y: int, pos_x: int, num: int) -> bool:
+        """
+        Detects in O(1) if a number can be placed in a cell.
+
+        Args:
+            pos_y (int): Y coordinate
+            pos_x (int): X coordinate
+            num (int): Number to check
+        Returns:
+            bool: True if the number is not used in the row, column or box.
+        """
+        return bool(self.candidates(pos_y, pos_x) >> (num - 1) & 1)
+
+    def empty_cells(self) -> list[tuple[int, int]]:
+        """Coordinates of the empty cells in row-major order."""
+        return [
+            (pos_y, pos_x)
+            for pos_y, row in enumerate(self.grid.data)
+            for pos_x, cell in enumerate(row)
+            if cell == 0
+        ]
+
+    def place(self, pos_y: int, pos_x: int, num: int) -> None:
+        """Set a number in the grid and mark it as used in its row, column and box."""
+        self.grid.data[pos_y][pos_x] = num
+        self._mark(pos_y, pos_x, 1 << (num - 1))
+        self.trail.append((pos_y, pos_x, None))
+
+    def _unplace(self, pos_y: int, pos_x: int) -> None:
+        row = self.grid.data[pos_y]
+        bit = ~(1 << (row[pos_x] - 1))
+        row[pos_x] = 0
+        self.rows[pos_y] &= bit
+        self.columns[pos_x] &= bit
+        self.boxes[self._box_of[pos_y * self._size + pos_x]] &= bit
+
+    def eliminate(self, pos_y: int, pos_x: int, bits: int) -> bool:
+        """
+        Remove candidates from a cell.
+
+        Args:
+            pos_y (int): Y coordinate
+            pos_x (int): X coordinate
+            bits (int): Mask of the numbers to remove.
+        Returns:
+            bool: True if any candidate of the cell was removed.
+        """
+        bits &= self.full_mask
+        previous = self.eliminated[pos_y][pos_x]
+        if not bits & ~previous & self.candidates(pos_y, pos_x):
+            return False
+        self.eliminated[pos_y][pos_x] = previous | bits
+        self.trail.append((pos_y, pos_x, previous))
+        return True
+
+    def mark(self) -> int:
+        """Position of the trail to `undo` the changes made after it."""
+        return len(self.trail)
+
+    def undo(self, mark: int) -> None:
+        """
+        Undo all the placements and eliminations made after a mark.
+
+        Args:
+            mark (int): Position of the trail returned by `mark`.
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            pos_y, pos_x, previous = trail.pop()
+            if previous is None:
+                self._unplace(pos_y, pos_x)
+            else:
+                self.eliminated[pos_y][pos_x] = previous
+
+    def propagate(self, pairs: bool = True) -> bool:
+        """
+        Fill and prune the grid with logical rules until nothing changes.
+
+        The rules are applied over every row, column and box:
+        - Naked single: a cell with only one candidate.
+        - Hidden single: a number that fits in only one cell of the unit.
+        - Naked pair: two cells with the same two candidates, which are removed
+          from the rest of the unit.
+        - Hidden pair: two numbers that only fit in the same two cells of the
+          unit, which lose any other candidate.
+
+        Args:
+            pairs (bool): Also apply the pair rules, not only the singles.
+        Returns:
+            bool: False if a contradiction was found, so the grid has no
+            solution. The changes stay in the trail to be undone.
+        """
+        while True:
+            placed = self._apply_singles()
+            if placed < 0:
+                return False
+            if placed:
+                continue
+            if not (pairs and self._apply_pairs()):
+                return True
+
+    def _apply_singles(self) -> int:
+        """Place naked and hidden singles, returns -1 on a contradiction."""
+        data = self.grid.data
+        cells = self.geometry.cells
+        placed = 0
+        # Naked singles
+        for pos_y, row in enumerate(data):
+            for pos_x in range(self._size):
+                if row[pos_x]:
+                    continue
+                candidates = self.candidates(pos_y, pos_x)
+                if not candidates:
+                    return -1
+                if not candidates & (candidates - 1):
+                    self.place(pos_y, pos_x, candidates.bit_length())
+                    placed += 1
+        # Hidden singles
+        for unit in self.geometry.units:
+            once = twice = used = 0
+            for cell in unit:
+                pos_y, pos_x = cells[cell]
+                if num := data[pos_y][pos_x]:
+                    used |= 1 << (num - 1)
+                    continue
+                candidates = self.candidates(pos_y, pos_x)
+                twice |= once & candidates
+                once |= candidates
+            # A number without a place in the unit
+            if once | used != self.full_mask:
+                return -1
+            hidden = once & ~twice
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+                for cell in unit:
+                    pos_y, pos_x = cells[cell]
+                    if not data[pos_y][pos_x] and self.candidates(pos_y, pos_x) & bit:
+                        self.place(pos_y, pos_x, bit.bit_length())
+                        placed += 1
+                        break
+        return placed
+
+    def _apply_pairs(self) -> bool:
+        """Remove candidates with naked and hidden pairs."""
+        data = self.grid.data
+        coordinates = self.geometry.cells
+        changed = False
+        for unit in self.geometry.units:
+            cells = [
+                (pos_y, pos_x, self.candidates(pos_y, pos_x))
+                for pos_y, pos_x in (coordinates[cell] for cell in unit)
+                if not data[pos_y][pos_x]
+            ]
+            # Naked pairs
+            pairs: dict[int, int] = {}
+            for index, (_, _, candidates) in enumerate(cells):
+                if candidates.bit_count() != 2:
+                    continue
+                if candidates not in pairs:
+                    pairs[candidates] = index
+                    continue
+                pair = (pairs[candidates], index)
+                for other, (pos_y, pos_x, _) in enumerate(cells):
+                    if other not in pair:
+                        changed |= self.eliminate(pos_y, pos_x, candidates)
+            # Hidden pairs: the cells (as a mask of indexes) of each number
+            places: dict[int, int] = {}
+            for index, (_, _, candidates) in enumerate(cells):
+                while candidates:
+                    bit = candidates & -candidates
+                    candidates ^= bit
+                    places[bit] = places.get(bit, 0) | 1 << index
+            numbers_in: dict[int, int] = {}
+            for bit, indexes in places.items():
+                if indexes.bit_count() == 2:
+                    numbers_in[indexes] = numbers_in.get(indexes, 0) | bit
+            for indexes, numbers in numbers_in.items():
+                if numbers.bit_count() != 2:
+                    continue
+                for index, (pos_y, pos_x, _) in enumerate(cells):
+                    if indexes >> index & 1:
+                        changed |= self.eliminate(pos_y, pos_x, ~numbers)
+        return changed
 
 
 class SudokuGame:
@@ -153,19 +762,77 @@ class SudokuGame:
     Class that represents a Sudoku puzzle and provides methods to solve the puzzle.
 
     Attributes:
-        grid (Grid): A 9x9 grid representing the Sudoku puzzle.
+        grid (Grid): A grid representing the Sudoku puzzle, 9x9 by default.
         initial_grid (Grid): A copy of the initial grid.
+        method (Method): Solver used by `solve`.
+        heuristic (Heuristic): How the bitmask solver picks the next empty cell.
+        propagate (bool): If the bitmask solver applies `ConstraintMasks.propagate`.
+        collect_stats (bool): If the searches count their work in `stats`.
+        stats (SolverStats | None): Counters of the last search, if collected.
+        cache (SolutionCache | None): Solutions shared by the equivalent puzzles.
+        status (SolveStatus | None): Result of the last `solve`.
     """
 
-    def __init__(self, grid) -> None:
+    def __init__(
+        self,
+        grid,
+        method: Method = "backtracking",
+        heuristic: Heuristic = "row_major",
+        propagate: bool = False,
+        box_size: int | None = None,
+        collect_stats: bool = False,
+        cache: SolutionCache | None = None,
+    ) -> None:
         """
         Initialize a Sudoku puzzle.
 
+        The "backtracking" method is only practical for 9x9 grids, the 16x16
+        and 25x25 grids need the "dlx" method or the "bitmask" method with
+        the "mrv" heuristic and propagation.
+
         Args:
-            grid (Grid): A 9x9 grid representing the Sudoku puzzle.
+            grid (Grid): A grid representing the Sudoku puzzle, 9x9 or of
+                any other square of a box size.
+            method (Method): Solver used by `solve`. "backtracking" scans the
+                grid to check every candidate, "bitmask" keeps the used numbers
+                of each row, column and box in `ConstraintMasks` and "dlx"
+                solves the exact cover problem with `DancingLinks`.
+            heuristic (Heuristic): Cell selection of the "bitmask" method.
+                "row_major" fills the empty cells from left to right and top to
+                bottom, "mrv" fills first the cell with the fewest candidates
+                (minimum remaining values) and "mrv_degree" breaks the ties of
+                "mrv" with the cell that constrains more empty cells.
+            propagate (bool): Apply the singles and pairs rules of
+                `ConstraintMasks.propagate` before the "bitmask" method starts
+                branching and again after every number it tries.
+            box_size (int | None): Rows and columns of every box, by default
+                the square root of the number of rows of the grid.
+            collect_stats (bool): Count the nodes, backtracks, depth and
+                propagations of every search in `stats`. It is off by default
+                because it slows down the search loops.
+            cache (SolutionCache | None): Where `solve` looks for the solutions
+                of the canonical form of the grid before searching them, and
+                keeps the ones it finds.
         """
-        self.grid: SudokuGrid = SudokuGrid(grid)
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+        if heuristic not in HEURISTICS:
+            raise ValueError(
+                f"Unknown heuristic {heuristic!r}, expected one of {HEURISTICS}"
+            )
+        if heuristic != "row_major" and method != "bitmask":
+            raise ValueError(f"The {heuristic!r} heuristic needs the bitmask method")
+        if propagate and method != "bitmask":
+            raise ValueError("The propagation needs the bitmask method")
+        self.grid: SudokuGrid = SudokuGrid(grid, box_size)
+        self.method: Method = method
+        self.heuristic: Heuristic = heuristic
+        self.propagate = propagate
         self.results: list[SudokuGrid] = []
+        self.collect_stats = collect_stats
+        self.stats: SolverStats | None = None
+        self.cache = cache
+        self.status: SolveStatus | None = None
 
     def __repr__(self) -> str:
         return f"""\
@@ -199,7 +866,162 @@ class SudokuGame:
 {self.grid}
 )"""
 
-    def solve(self):
+    def solve(
+        self, max_solutions: int | None = None, budget: SearchBudget | None = None
+    ) -> list[SudokuGrid]:
+        """
+        Solve the Sudoku puzzle with the selected method.
+
+        The search stops as soon as `max_solutions` solutions are found, or
+        when the `budget` is exhausted, which is told apart by `status`. With
+        a `cache`, the solutions of an equivalent puzzle that was already
+        solved are moved to this grid instead, without searching them.
+
+        Example:
+        >>> sudoku.solve(max_solutions=1, budget=SearchBudget(timeout=1.0))
+        >>> sudoku.status
+        <SolveStatus.TIMED_OUT: 'timed_out'>
+
+        Args:
+            max_solutions (int | None): Maximum number of solutions to find.
+                If None all the solutions are found.
+            budget (SearchBudget | None): Limits of the search, unlimited if None.
+        Returns:
+            list[SudokuGrid]: The solutions found, which are also kept in
+            `results`. If the search is stopped, the ones found before.
+        """
+        if self.cache is not None:
+            return self._solve_cached(self.cache, max_solutions, budget)
+        self._search_results(max_solutions, budget)
+        return self.results
+
+    def _search_results(
+        self, max_solutions: int | None, budget: SearchBudget | None
+    ) -> bool:
+        """
+        Search the solutions of `solve` and set its `results` and `status`.
+
+        Returns:
+            bool: False if the budget stopped the search.
+        """
+        self.results = []
+        try:
+            with closing(self.iter_solutions(budget)) as solutions:
+                self.results.extend(islice(solutions, max_solutions))
+        except SearchStopped as stopped:
+            self.status = stopped.status
+            return False
+        self.status = SolveStatus.SOLVED if self.results else SolveStatus.NO_SOLUTION
+        return True
+
+    def _solve_cached(
+        self,
+        cache: SolutionCache,
+        max_solutions: int | None,
+        budget: SearchBudget | None,
+    ) -> list[SudokuGrid]:
+        """`solve` looking first for the solutions of the canonical form."""
+        box_size = self.grid.box_size
+        canonical = canonical_form(self.grid.data, box_size)
+        cached = cache.get(canonical.form, max_solutions)
+        if cached is None:
+            # The solutions of a stopped search are not all the ones requested
+            if self._search_results(max_solutions, budget):
+                cache.put(
+                    canonical.form,
+                    [canonical.to_canonical(result.data) for result in self.results],
+                    max_solutions is None or len(self.results) < max_solutions,
+                )
+        else:
+            self.stats = SolverStats() if self.collect_stats else None
+            self.results = [
+                self.grid.__class__(canonical.from_canonical(form), box_size)
+                for form in cached
+            ]
+            self.status = (
+                SolveStatus.SOLVED if self.results else SolveStatus.NO_SOLUTION
+            )
+        return self.results
+
+    def iter_solutions(
+        self, budget: SearchBudget | None = None
+    ) -> Iterator[SudokuGrid]:
+        """
+        Find the solutions of the Sudoku puzzle lazily.
+
+        The search is paused after every solution until the next one is
+        requested, so the solutions can be streamed without keeping them all.
+        Closing the generator stops the search and restores the grid.
+
+        Example:
+        >>> solutions = sudoku.iter_solutions()
+        >>> first = next(solutions)
+        >>> solutions.close()
+
+        Args:
+            budget (SearchBudget | None): Limits of the search, unlimited if None.
+        Yields:
+            SudokuGrid: A new grid for every solution.
+        Raises:
+            SearchStopped: If the budget stops the search, with the grid restored.
+        """
+        with closing(self._solutions(budget)) as solutions:
+            for solution in solutions:
+                yield self.grid.__class__(
+                    [row[:] for row in solution], self.grid.box_size
+                )
+
+    def count_solutions(
+        self, limit: int | None = None, budget: SearchBudget | None = None
+    ) -> int:
+        """
+        Count the solutions of the Sudoku puzzle without storing them.
+
+        Example:
+        >>> sudoku.count_solutions(limit=2) == 1  # Has a unique solution
+        True
+
+        Args:
+            limit (int | None): Stop counting when this number is reached.
+                If None all the solutions are counted.
+            budget (SearchBudget | None): Limits of the search, unlimited if None.
+        Returns:
+            int: Number of solutions found, at most `limit`.
+        Raises:
+            SearchStopped: If the budget stops the search.
+        """
+        if self.method == "dlx":
+            # Count the exact covers without building the grid of each one
+            self.stats = SolverStats() if self.collect_stats else None
+            with dancing_links(self.grid.box_size) as matrix:
+                return matrix.count(self.grid.data, limit, self.stats, budget)
+        with closing(self._solutions(budget)) as solutions:
+            return sum(1 for _ in islice(solutions, limit))
+
+    def _solutions(
+        self, budget: SearchBudget | None = None
+    ) -> Iterator[list[list[int]]]:
+        """
+        Solutions of the Sudoku puzzle with the selected method.
+
+        The counters of `stats` start again from zero.
+
+        Args:
+            budget (SearchBudget | None): Limits of the search.
+        Yields:
+            list[list[int]]: Rows of a solution, only valid until the next one
+            is requested, as they may be the rows of `grid` itself.
+        """
+        self.stats = SolverStats() if self.collect_stats else None
+        if self.method == "bitmask":
+            return self._solve_bitmask(budget)
+        if self.method == "dlx":
+            return self._solve_dlx(budget)
+        return self._solve_backtracking(budget=budget)
+
+    def _solve_backtracking(
+        self, depth: int = 0, budget: SearchBudget | None = None
+    ) -> Iterator[list[list[int]]]:
         """
         Solve the Sudoku puzzle using backtracking.
 
@@ -213,33 +1035,209 @@ class SudokuGame:
         After solving the puzzle, the method prints the solved grid and saves it to
         a text file. It also pauses the process and asks the user if they want to
         continue.
+
+        Args:
+            depth (int): Number of cells filled by the previous calls.
+            budget (SearchBudget | None): Limits of the search.
         """
+        stats = self.stats
         # Iter over all cells
         for pos_y, row in enumerate(self.grid):
             for pos_x, cell in enumerate(row):
                 # If the cell is empty
                 if cell == 0:
+                    if stats is not None:
+                        stats.max_depth = max(stats.max_depth, depth + 1)
                     # Try all numbers
-                    for num in range(1, 10):
+                    for num in range(1, self.grid.geometry.size + 1):
                         if self.grid.can_set_in(pos_y, pos_x, num):
                             # Set the number in the sudoku
                             row[pos_x] = num
-                            # Continue detecting
-                            self.solve()
-                            # If there are no ways to set the number, backtrack
-                            # emptying the cell and trying another number
-                            row[pos_x] = 0
+                            if stats is not None:
+                                stats.nodes += 1
+                            try:
+                                if budget is not None:
+                                    budget.spend()
+                                # Continue detecting
+                                yield from self._solve_backtracking(depth + 1, budget)
+                            finally:
+                                # If there are no ways to set the number, backtrack
+                                # emptying the cell and trying another number
+                                row[pos_x] = 0
+                    if stats is not None:
+                        stats.backtracks += 1
                     # Try another cell
                     return
         # If there are no empty cells, you finished with an answer
-        self.results.append(self.grid.copy())
+        yield self.grid.data
+
+    def _solve_bitmask(
+        self, budget: SearchBudget | None = None
+    ) -> Iterator[list[list[int]]]:
+        """
+        Solve the Sudoku puzzle using backtracking over `ConstraintMasks`.
+
+        With the "row_major" heuristic the empty cells are filled in the same
+        order as `_solve_backtracking`, so the solutions are found in the same
+        order, but every candidate is checked with the masks instead of
+        scanning the grid.
+
+        The search is iterative: the cells being filled are kept in an explicit
+        stack, and going back to a cell undoes the trail of `ConstraintMasks`
+        up to the mark taken before filling it. So it does not depend on the
+        recursion limit and it can be paused between solutions for as long
+        as needed.
+
+        The grid is left as it was when the search finishes or is stopped,
+        also by the `budget`, which is spent at every number tried.
+        """
+        masks = ConstraintMasks(self.grid)
+        stats = self.stats
+        try:
+            if self.propagate and not self._propagate(masks):
+                return
+            empty_cells = masks.empty_cells()
+            # Each frame has the index of a cell in `empty_cells`, the candidates
+            # not tried yet in it and the trail mark before filling it
+            stack: list[tuple[int, int, int]] = []
+            # Local names to avoid attribute lookups in the hot loop
+            candidates_of, place, undo = masks.candidates, masks.place, masks.undo
+            trail, propagate = masks.trail, self.propagate
+            index = self._next_cell(masks, empty_cells, 0)
+            while True:
+                if index < 0:
+                    # If there are no empty cells, you finished with an answer
+                    yield self.grid.data
+                else:
+                    pos_y, pos_x = empty_cells[index]
+                    stack.append((index, candidates_of(pos_y, pos_x), len(trail)))
+                    if stats is not None:
+                        stats.max_depth = max(stats.max_depth, len(stack))
+                # Try the next candidate of the last cell, going back to the
+                # previous cells when there are no candidates left
+                while stack:
+                    index, candidates, mark = stack[-1]
+                    undo(mark)
+                    if not candidates:
+                        stack.pop()
+                        if stats is not None:
+                            stats.backtracks += 1
+                        continue
+                    # Take the lowest candidate left
+                    bit = candidates & -candidates
+                    stack[-1] = (index, candidates ^ bit, mark)
+                    pos_y, pos_x = empty_cells[index]
+                    place(pos_y, pos_x, bit.bit_length())
+                    if stats is not None:
+                        stats.nodes += 1
+                    if budget is not None:
+                        budget.spend()
+                    if not propagate or self._propagate(masks):
+                        break
+                else:
+                    return
+                index = self._next_cell(masks, empty_cells, index + 1)
+        finally:
+            masks.undo(0)
+
+    def _propagate(self, masks: ConstraintMasks) -> bool:
+        """`ConstraintMasks.propagate`, counting its changes in `stats`."""
+        if self.stats is None:
+            return masks.propagate()
+        start = masks.mark()
+        consistent = masks.propagate()
+        self.stats.propagations += masks.mark() - start
+        return consistent
+
+    def _solve_dlx(
+        self, budget: SearchBudget | None = None
+    ) -> Iterator[list[list[int]]]:
+        """
+        Solve the Sudoku puzzle as an exact cover problem with Dancing Links.
+
+        The constraint matrices of `dancing_links` are reused for every
+        puzzle, so only the search is paid for each one. The matrix is kept
+        while the search is paused, so other searches use a different one.
+        """
+        with dancing_links(self.grid.box_size) as matrix:
+            yield from matrix.solutions(self.grid.data, self.stats, budget)
+
+    def _next_cell(
+        self, masks: ConstraintMasks, empty_cells: list[tuple[int, int]], start: int
+    ) -> int:
+        """
+        Index of the next cell to fill with the selected heuristic.
+
+        Args:
+            masks (ConstraintMasks): Masks of the current grid.
+            empty_cells (list[tuple[int, int]]): Cells that were empty before
+                the search, some of them may be filled now.
+            start (int): With "row_major", the first index that may be empty.
+        Returns:
+            int: Index in `empty_cells` of the cell to fill next, -1 if all the
+            cells are filled.
+        """
+        data = self.grid.data
+        if self.heuristic == "row_major":
+            for index in range(start, len(empty_cells)):
+                pos_y, pos_x = empty_cells[index]
+                if not data[pos_y][pos_x]:
+                    return index
+            return -1
+        return self._select_cell(masks, empty_cells)
+
+    def _select_cell(
+        self, masks: ConstraintMasks, empty_cells: list[tuple[int, int]]
+    ) -> int:
+        """
+        Index of the empty cell with the fewest candidates (MRV).
+
+        Args:
+            masks (ConstraintMasks): Masks of the current grid.
+            empty_cells (list[tuple[int, int]]): Cells that may be empty.
+        Returns:
+            int: Index in `empty_cells` of the cell to fill next, -1 if all the
+            cells are filled.
+        """
+        data = self.grid.data
+        best_index, best_count, best_degree = -1, self.grid.geometry.size + 1, -1
+        for index, (pos_y, pos_x) in enumerate(empty_cells):
+            if data[pos_y][pos_x]:
+                continue
+            count = masks.candidates(pos_y, pos_x).bit_count()
+            if count > best_count:
+                continue
+            if self.heuristic == "mrv_degree":
+                # Break ties with the cell that has more empty peers
+                degree = self._degree(data, pos_y, pos_x)
+                if count == best_count and degree <= best_degree:
+                    continue
+                best_degree = degree
+            elif count == best_count:
+                continue
+            best_index, best_count = index, count
+            # A dead end or a forced cell cannot be improved
+            if count <= 1:
+                break
+        return best_index
+
+    def _degree(self, data: list[list[int]], pos_y: int, pos_x: int) -> int:
+        """Number of empty cells that share a row, column or box with a cell."""
+        tables = self.grid.geometry
+        degree = 0
+        for peer in tables.peers[pos_y * tables.size + pos_x]:
+            peer_y, peer_x = tables.cells[peer]
+            if not data[peer_y][peer_x]:
+                degree += 1
+        return degree
 
-    def save_results(self, filename: str) -> None:
+    def save_results(self, filename: str, compact: bool = False) -> None:
         """
         Save the answer of the Sudoku puzzle in a text file.
 
         This function appends the answer to the end of the file
-        with the following format:
+        with the following format, or one line per solution in the
+        format of `SudokuGrid.to_line` if `compact` is True:
 
         >>> save_answer("sudoku_solver_oop.txt")
         6 3 9  |  4 2 5  |  7 1 8
@@ -257,6 +1255,7 @@ class SudokuGame:
 
         Args:
             filename (str): Name of the file to save the answer.
+            compact (bool): Write every solution in a single line.
 
         Raises:
             ValueError: If there are no results to save.
@@ -264,8 +1263,14 @@ class SudokuGame:
         if not self.results:
             self.solve()
 
-        with open(filename, "r", encoding="utf-8") as file:
-            file.write(f"\n{'='*25}\n".join(str(result) for result in self.results))
+        with open(filename, "a", encoding="utf-8") as file:
+            if compact:
+                file.writelines(f"{result.to_line()}\n" for result in self.results)
+            else:
+                file.writelines(
+                    f"{result}\n{'=' * len(str(result).partition('\n')[0])}\n"
+                    for result in self.results
+                )
 
 
 # %%
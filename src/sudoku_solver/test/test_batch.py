@@ -0,0 +1,97 @@
+"""
+This module contains the test cases for the `batch` module of the Sudoku solver.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.sudoku_solver.batch import main, solve_batch
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+PUZZLES = [
+    "000000700040030065001008000060050039400600000000000020800003097000070400090000200",
+    "003020600900305001001806400008102900700000008006708200002609500800203009005010300",
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "550000000000000000000000000000000000000000000000000000000000000000000000000000000",
+]
+
+
+def make_grid(line: str) -> list[list[int]]:
+    """Grid of a puzzle written as 81 digits"""
+    return [[int(char) for char in line[row : row + 9]] for row in range(0, 81, 9)]
+
+
+def test_solve_batch():
+    """
+    Test case for `solve_batch`.
+
+    The solutions must keep the order of the puzzles, and the puzzle with two
+    5 in the same row has no solutions.
+    """
+    puzzles = [make_grid(line) for line in PUZZLES] * 3
+
+    results = list(solve_batch(puzzles, workers=2, chunk_size=2))
+
+    assert len(results) == len(puzzles)
+    for puzzle, solutions in zip(puzzles[:3], results[:3]):
+        assert solutions == SudokuGame(puzzle, method="dlx").solve(max_solutions=1)
+    assert results[:4] == results[4:8] == results[8:]
+    assert not results[3]
+
+
+def test_batch_main(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Test case for the `main` program of the batch, with a puzzle that is not valid.
+
+    The invalid and unsolvable puzzles are written as empty grids, keeping a
+    line for every puzzle.
+    """
+    puzzles = tmp_path / "puzzles.txt"
+    solutions = tmp_path / "solutions.txt"
+    puzzles.write_text(f"{PUZZLES[1]}\n{PUZZLES[3]}\nnot a puzzle\n{PUZZLES[0]}\n")
+    arguments = ["batch", str(puzzles), str(solutions), "--workers", "1"]
+    monkeypatch.setattr(sys, "argv", arguments)
+
+    main()
+
+    lines = solutions.read_text().splitlines()
+    assert len(lines) == 4
+    assert lines[1] == lines[2] == "." * 81
+    assert (
+        SudokuGrid.from_line(lines[0])
+        == SudokuGame(make_grid(PUZZLES[1]), method="dlx").solve(max_solutions=1)[0]
+    )
+    assert "." not in lines[3]
+
+
+def test_batch_main_box_size(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Test case for the `main` program of the batch with 4x4 puzzles.
+
+    The puzzles that are not valid are written as empty grids of the box size.
+    """
+    puzzles = tmp_path / "puzzles.txt"
+    solutions = tmp_path / "solutions.txt"
+    puzzles.write_text("1.3.3.1.2.4.4.2.\nnot a puzzle\n")
+    arguments = ["batch", str(puzzles), str(solutions), "--box-size", "2"]
+    monkeypatch.setattr(sys, "argv", arguments + ["--workers", "1"])
+
+    main()
+
+    lines = solutions.read_text().splitlines()
+    assert lines == ["1234341221434321", "." * 16]
+
+
+def test_solve_batch_budget():
+    """
+    Test case for `solve_batch` with a node budget, where the empty grid, with
+    too many solutions to search, gives up with the solutions found before
+    without stopping the next puzzles.
+    """
+    puzzles = [[[0] * 9 for _ in range(9)], make_grid(PUZZLES[1])]
+
+    results = list(solve_batch(puzzles, max_solutions=None, workers=1, max_nodes=100))
+
+    assert len(results[0]) < 100
+    assert len(results[1]) == 1
@@ -0,0 +1,31 @@
+"""
+This module contains the test cases for the `benchmark` module of the Sudoku solver.
+"""
+from src.sudoku_solver.benchmark import CORPORA, run_benchmark
+from src.sudoku_solver.sudoku_solver_oop import SudokuGrid
+
+
+def test_run_benchmark():
+    """
+    Test case for `run_benchmark` with the easy and hard corpora.
+    """
+    easy = [SudokuGrid.from_line(line) for line in CORPORA["easy"]]
+    hard = [SudokuGrid.from_line(line) for line in CORPORA["hard"]]
+
+    easy_result = run_benchmark("easy", easy, repeat=2)
+    hard_result = run_benchmark("hard", hard, "dlx")
+
+    assert len(easy_result.latencies) == len(easy)
+    assert 0 < easy_result.percentile(50) <= easy_result.percentile(99)
+    assert easy_result.puzzles_per_second > 0
+    assert easy_result.peak_memory > 0
+    # The easy puzzles are solved by the propagation without search
+    assert easy_result.stats.nodes == 0
+    assert easy_result.stats.propagations > 0
+    assert hard_result.stats.nodes > 0
+    # The hard puzzles need search even with the propagation
+    assert run_benchmark("hard", hard[:1]).stats.nodes > 0
+    assert hard_result.stats.propagations == 0
+    assert "easy" in str(easy_result)
+    # The puzzles are not modified
+    assert [grid.to_line() for grid in easy] == list(CORPORA["easy"])
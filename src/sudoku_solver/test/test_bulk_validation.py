@@ -0,0 +1,81 @@
+"""
+This module contains the test cases for the `bulk_validation` module of the Sudoku solver.
+"""
+import numpy as np
+import pytest
+
+from src.sudoku_solver.bulk_validation import GridError, validate_grids
+from src.sudoku_solver.sudoku_solver_oop import SudokuGrid
+
+SOLUTION = (
+    "639425718248137965571968342162754839483692571957381624826543197315279486794816253"
+)
+PUZZLE = (
+    "......7...4..3..65..1..8....6..5..394..6............2.8....3.97....7.4...9....2.."
+)
+
+
+def make_array(line: str) -> np.ndarray:
+    """Array of a grid written in the compact format"""
+    return np.array(SudokuGrid.from_line(line).data, dtype=np.uint8)
+
+
+def test_validate_grids():
+    """
+    Test case for `validate_grids` with one grid of every kind of error.
+    """
+    solution = make_array(SOLUTION)
+    puzzle = make_array(PUZZLE)
+    out_of_range = solution.copy()
+    out_of_range[4, 4] = 12
+    repeated_row = solution.copy()
+    repeated_row[0, :2] = repeated_row[0, 1::-1]  # Same numbers, swapped
+    repeated_row[1, 0] = repeated_row[0, 0]
+    swapped_rows = solution.copy()
+    swapped_rows[[0, 1], 0] = swapped_rows[[1, 0], 0]
+    repeated_column = solution.copy()
+    repeated_column[0, 0] = repeated_column[8, 0]
+    grids = np.stack(
+        [solution, puzzle, out_of_range, repeated_row, swapped_rows, repeated_column]
+    )
+
+    valid, errors = validate_grids(grids, chunk_size=4)
+
+    assert valid.tolist() == [True, True, False, False, False, False]
+    assert errors[2] == GridError.RANGE
+    assert errors[3] & GridError.COLUMN and errors[3] & GridError.BOX
+    assert errors[4] == GridError.ROW  # Same numbers in the column and the box
+    assert errors[5] & GridError.COLUMN and errors[5] & GridError.ROW
+
+    valid, errors = validate_grids(grids[:2], complete=True)
+    assert valid.tolist() == [True, False]
+    assert errors[1] == GridError.INCOMPLETE
+
+
+def test_validate_grids_shape():
+    """
+    Test case for `validate_grids` with arrays that are not grids.
+    """
+    valid, _ = validate_grids(make_array(SOLUTION))
+    assert valid.tolist() == [True]
+    with pytest.raises(ValueError):
+        validate_grids(np.zeros((2, 9, 8), dtype=np.uint8))
+    with pytest.raises(TypeError):
+        validate_grids(np.zeros((2, 9, 9), dtype=np.float32))
+
+
+def test_validate_big_grids():
+    """
+    Test case for `validate_grids` with 16x16 grids.
+    """
+    grids = np.zeros((3, 16, 16), dtype=np.uint8)
+    grids[1, 0, 0] = grids[1, 15, 0] = 16
+    grids[2, 3, 3] = 17
+
+    valid, errors = validate_grids(grids)
+
+    assert valid.tolist() == [True, False, False]
+    assert errors[1] == GridError.COLUMN
+    assert errors[2] == GridError.RANGE
+    with pytest.raises(ValueError):
+        validate_grids(np.zeros((2, 10, 10), dtype=np.uint8))
@@ -0,0 +1,66 @@
+"""
+This module contains the test cases for the `generator` module of the Sudoku solver.
+"""
+import random
+
+from src.sudoku_solver.generator import (
+    Difficulty,
+    generate,
+    generate_batch,
+    random_solution,
+    rate,
+)
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+
+def test_generate():
+    """
+    Test case for `generate`, which must make puzzles with a unique solution.
+    """
+    rng = random.Random(7)
+
+    solution = random_solution(rng)
+    puzzle = generate(rng)
+    small_puzzle = generate(rng, box_size=2)
+
+    assert "." not in solution.to_line()
+    assert SudokuGrid(solution.data) == solution
+    for generated in (puzzle, small_puzzle):
+        sudoku = SudokuGame(generated.grid, method="dlx")
+        assert sudoku.solve() == [generated.solution]
+        assert rate(generated.grid) == generated.difficulty
+        # Removing any other clue makes the solution not unique
+        for row in generated.grid:
+            for pos_x, num in enumerate(row):
+                if num:
+                    row[pos_x] = 0
+                    assert sudoku.count_solutions(limit=2) == 2
+                    row[pos_x] = num
+
+
+def test_rate():
+    """
+    Test case for `rate` with puzzles that need different rules.
+    """
+    easy = SudokuGrid.from_line(
+        "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+    )
+    hard = SudokuGrid.from_line(
+        "......7...4..3..65..1..8....6..5..394..6............2.8....3.97....7.4...9....2.."
+    )
+
+    assert rate(easy) == Difficulty.EASY
+    assert rate(hard) == Difficulty.HARD
+    assert easy.to_line().count(".") == 49  # Not modified
+
+
+def test_generate_batch():
+    """
+    Test case for `generate_batch`, which must repeat the puzzles of a seed.
+    """
+    first = list(generate_batch(5, seed=3, workers=2, chunk_size=2))
+    second = list(generate_batch(5, Difficulty.EASY, seed=3, workers=1))
+
+    assert len(first) == len(second) == 5
+    assert first == list(generate_batch(5, seed=3, workers=1, chunk_size=2))
+    assert all(puzzle.difficulty == Difficulty.EASY for puzzle in second)
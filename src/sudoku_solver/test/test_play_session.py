@@ -0,0 +1,74 @@
+"""
+This module contains the test cases for the `play_session` module of the Sudoku solver.
+"""
+import pytest
+
+from src.sudoku_solver.play_session import PlaySession
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+EASY = (
+    "..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3.."
+)
+HARD = (
+    "......7...4..3..65..1..8....6..5..394..6............2.8....3.97....7.4...9....2.."
+)
+
+
+def test_play_and_undo():
+    """
+    Test case for `PlaySession.play`, `undo` and `erase`, which must keep the
+    candidates in sync with the grid.
+    """
+    grid = SudokuGrid.from_line(EASY)
+    session = PlaySession(grid)
+
+    assert session.is_consistent(0, 0, 4)
+    assert not session.is_consistent(0, 0, 3)  # In the row
+    assert not session.is_consistent(0, 2, 4)  # Not empty
+    session.play(0, 0, 4)
+    session.play(0, 1, 8)
+    assert 4 not in session.candidates(0, 3)
+    with pytest.raises(ValueError):
+        session.play(0, 3, 4)
+    session.erase(0, 0)
+    assert session.grid[0, 0] == 0 and session.grid[0, 1] == 8
+    assert 4 in session.candidates(0, 3)
+    assert session.undo() == (0, 1, 8)
+    assert session.grid == grid
+    with pytest.raises(ValueError):
+        session.erase(0, 2)
+    assert session.grid == grid
+
+
+def test_hints():
+    """
+    Test case for `PlaySession.hint`, where playing the hints solves the puzzle.
+    """
+    for line in (EASY, HARD):
+        grid = SudokuGrid.from_line(line)
+        session = PlaySession(grid)
+        rules = set()
+
+        while hint := session.hint():
+            rules.add(hint.rule)
+            session.play(hint.pos_y, hint.pos_x, hint.num)
+
+        assert session.grid == SudokuGame(grid, method="dlx").solve()[0]
+        assert "naked_single" in rules
+    assert rules == {"naked_single", "hidden_single", "solution"}
+
+
+def test_is_solvable():
+    """
+    Test case for `PlaySession.is_solvable`, after a move that is consistent
+    but goes against the only solution.
+    """
+    session = PlaySession(SudokuGrid.from_line(EASY))
+    solution = SudokuGame(session.grid, method="dlx").solve()[0]
+    wrong = next(num for num in session.candidates(0, 0) if num != solution[0, 0])
+
+    assert session.is_solvable()
+    session.play(0, 0, wrong)
+    assert not session.is_solvable()
+    session.undo()
+    assert session.is_solvable()
@@ -0,0 +1,83 @@
+"""
+This module contains the test cases for the `puzzle_io` module of the Sudoku solver.
+"""
+from pathlib import Path
+
+import pytest
+
+from src.sudoku_solver.puzzle_io import PuzzleWriter, read_drawn_puzzles, read_puzzles
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+LINES = [
+    "......7...4..3..65..1..8....6..5..394..6............2.8....3.97....7.4...9....2..",
+    "..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..",
+]
+
+
+def test_compact_format():
+    """
+    Test case for `SudokuGrid.from_line` and `SudokuGrid.to_line`.
+    """
+    grid = SudokuGrid.from_line(LINES[0].replace(".", "0"))
+
+    assert grid[0] == [0, 0, 0, 0, 0, 0, 7, 0, 0]
+    assert grid.to_line() == LINES[0]
+    with pytest.raises(ValueError):
+        SudokuGrid.from_line(LINES[0][:-1])
+
+
+def test_read_write_puzzles(tmp_path: Path):
+    """
+    Test case for `PuzzleWriter` and `read_puzzles`.
+
+    The writer appends to the file and keeps the grids until its buffer is full.
+    """
+    path = tmp_path / "puzzles.txt"
+    path.write_text("# Puzzles\n\n  # Indented comment\n", "utf-8")
+    grids = [SudokuGrid.from_line(line) for line in LINES]
+
+    with PuzzleWriter(path, buffer_size=2) as writer:
+        writer.write(grids[0])
+        assert len(list(read_puzzles(path))) == 0
+        writer.write_all(grids)
+        assert len(list(read_puzzles(path))) == 2
+
+    assert list(read_puzzles(path)) == [grids[0], *grids]
+
+
+def test_read_drawn_puzzles(tmp_path: Path):
+    """
+    Test case for `read_drawn_puzzles` with the format of `SudokuGame.save_results`.
+    """
+    path = tmp_path / "solutions.txt"
+    sudokus = [SudokuGame(SudokuGrid.from_line(line), method="dlx") for line in LINES]
+    for sudoku in sudokus:
+        sudoku.save_results(str(path))
+
+    assert list(read_drawn_puzzles(path)) == [
+        solution for sudoku in sudokus for solution in sudoku.results
+    ]
+
+    compact_path = tmp_path / "solutions_compact.txt"
+    for sudoku in sudokus:
+        sudoku.save_results(str(compact_path), compact=True)
+
+    assert list(read_puzzles(compact_path)) == list(read_drawn_puzzles(path))
+
+
+def test_read_drawn_puzzles_box_size(tmp_path: Path):
+    """
+    Test case for `read_drawn_puzzles` with 16x16 grids, whose numbers are
+    separated by spaces.
+    """
+    path = tmp_path / "solutions.txt"
+    grid = SudokuGrid(
+        [
+            [(4 * (row % 4) + row // 4 + col) % 16 + 1 for col in range(16)]
+            for row in range(16)
+        ]
+    )
+    path.write_text(f"{grid}\n{'=' * 20}\n{grid}\n", "utf-8")
+
+    assert list(read_drawn_puzzles(path, box_size=4)) == [grid, grid]
+    assert not list(read_drawn_puzzles(path))
@@ -0,0 +1,89 @@
+"""
+This module contains the test cases for the `service` module of the Sudoku solver.
+"""
+import asyncio
+import json
+
+import pytest
+
+from src.sudoku_solver.service import ServiceBusy, SolverService, solve_requests
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+PUZZLE = (
+    "..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3.."
+)
+
+
+async def post(port: int, path: str, body: bytes) -> tuple[int, dict]:
+    """Status code and JSON answer of a POST request to the service."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    answer = await reader.read()
+    writer.close()
+    head, _, data = answer.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(data)
+
+
+def test_solve_requests():
+    """
+    Test case for `solve_requests`, with the status of every puzzle.
+    """
+    expected = SudokuGame(SudokuGrid.from_line(PUZZLE), method="dlx").solve()
+
+    results = solve_requests([(PUZZLE, 2), ("12", 1), ("." * 81, 1)], max_nodes=10)
+
+    assert results[0] == ("solved", [expected[0].to_line()])
+    assert results[1][0] == "invalid"
+    assert results[2] == ("budget_exhausted", [])
+
+
+def test_service_http():
+    """
+    Test case for the HTTP endpoint of `SolverService`, with concurrent
+    requests that are solved in the same batch.
+    """
+
+    async def scenario() -> list[tuple[int, dict]]:
+        async with SolverService(workers=1, batch_delay=0.05) as service:
+            server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                body = json.dumps({"puzzle": PUZZLE}).encode()
+                return await asyncio.gather(
+                    post(port, "/solve", body),
+                    post(port, "/solve", body),
+                    post(port, "/solve", b"{}"),
+                    post(port, "/other", b""),
+                )
+
+    answers = asyncio.run(scenario())
+
+    assert answers[0] == answers[1]
+    assert answers[0][0] == 200 and answers[0][1]["status"] == "solved"
+    assert "." not in answers[0][1]["solutions"][0]
+    assert answers[2][0] == 400
+    assert answers[3][0] == 404
+
+
+def test_service_busy():
+    """
+    Test case for the backpressure of `SolverService`, which refuses the
+    requests when its queue is full.
+    """
+
+    async def scenario() -> None:
+        service = SolverService(workers=1, queue_size=1)
+        # Not started, so the queued request is never taken
+        waiting = asyncio.create_task(service.solve(PUZZLE))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceBusy):
+            await service.solve(PUZZLE)
+        await service.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+"""
+This module contains the test cases for the `solution_cache` module of the Sudoku solver.
+"""
+from pathlib import Path
+
+from src.sudoku_solver.solution_cache import SolutionCache, canonical_form
+from src.sudoku_solver.sudoku_solver_oop import SudokuGame, SudokuGrid
+
+PUZZLE = (
+    "......7...4..3..65..1..8....6..5..394..6............2.8....3.97....7.4...9....2.."
+)
+
+
+def make_variant(grid: SudokuGrid) -> SudokuGrid:
+    """
+    An equivalent puzzle: relabeled, with two bands, two rows of a band and two
+    stacks swapped, and transposed.
+    """
+    relabel = [0, 5, 3, 9, 1, 2, 8, 4, 7, 6]
+    rows = [3, 5, 4, 0, 1, 2, 6, 7, 8]
+    cols = [6, 7, 8, 3, 4, 5, 0, 1, 2]
+    moved = [[relabel[grid[row][col]] for col in cols] for row in rows]
+    return SudokuGrid([list(col) for col in zip(*moved)])
+
+
+def test_canonical_form():
+    """
+    Test case for `canonical_form`, which must be the same for a variant and
+    move the grids back and forth.
+    """
+    grid = SudokuGrid.from_line(PUZZLE)
+    variant = make_variant(grid)
+
+    canonical = canonical_form(grid.data)
+
+    assert canonical_form(variant.data).form == canonical.form
+    assert canonical.from_canonical(canonical.form) == grid.data
+    assert canonical.to_canonical(grid.data) == canonical.form
+
+
+def test_solve_cached(tmp_path: Path):
+    """
+    Test case for `SudokuGame.solve` with a `SolutionCache`, where the solution
+    of a variant is found without searching, also after reopening the database.
+    """
+    path = tmp_path / "solutions.sqlite"
+    grid = SudokuGrid.from_line(PUZZLE)
+    variant = make_variant(grid)
+    expected = SudokuGame(variant.copy(), method="dlx").solve()
+
+    with SolutionCache(path) as cache:
+        SudokuGame(grid, method="dlx", cache=cache).solve(max_solutions=1)
+        assert len(cache) == 1
+    with SolutionCache(path) as cache:
+        sudoku = SudokuGame(variant, method="dlx", collect_stats=True, cache=cache)
+        solutions = sudoku.solve(max_solutions=1)
+
+    assert solutions == expected
+    assert sudoku.stats is not None and sudoku.stats.nodes == 0
+
+
+def test_cache_max_solutions():
+    """
+    Test case for `SolutionCache.get`, which must search again when it does
+    not have enough solutions.
+    """
+    grid = SudokuGrid.from_line(PUZZLE)
+    grid[0, 6] = 0  # Puzzle with many solutions
+    cache = SolutionCache(maxsize=1)
+
+    first = SudokuGame(grid.copy(), method="dlx", cache=cache).solve(max_solutions=2)
+    canonical = canonical_form(grid.data)
+
+    assert len(first) == 2
+    assert cache.get(canonical.form, 2) is not None
+    assert cache.get(canonical.form, 3) is None
+    assert cache.get(canonical.form) is None
+    cache.put(b"other", [], True)
+    assert cache.get(canonical.form, 1) is None  # Forgotten by the LRU
@@ -3,7 +3,22 @@ This module contains the test cases for the `Sudoku` class in the `sudoku_solver
 """
 import pytest
 
-from src.sudoku_solver.sudoku_solver_oop import SudokuGame
+from src.sudoku_solver.dancing_links import dancing_links
+from src.sudoku_solver.search_budget import (
+    CancellationToken,
+    SearchBudget,
+    SearchStopped,
+    SolveStatus,
+)
+from src.sudoku_solver.sudoku_solver_oop import (
+    METHODS,
+    ConstraintMasks,
+    FlatSudokuGrid,
+    Heuristic,
+    Method,
+    SudokuGame,
+    SudokuGrid,
+)
 
 
 @pytest.fixture
@@ -65,3 +80,372 @@ Sudoku(
 7 9 4  |  8 1 6  |  2 5 3"""
 
     assert str(sudoku.results[0]) == solved_sudoku_str
+
+
+def test_solve_bitmask(sudoku: SudokuGame):  # pylint: disable=redefined-outer-name
+    """
+    Test case for the "bitmask" method of the `Sudoku` class.
+
+    It must find the same solutions, in the same order, as the backtracking method.
+    """
+    bitmask_sudoku = SudokuGame(sudoku.grid.copy(), method="bitmask")
+
+    sudoku.solve()
+    bitmask_sudoku.solve()
+
+    assert bitmask_sudoku.results == sudoku.results
+    assert bitmask_sudoku.grid == sudoku.grid
+
+
+def test_unknown_method(sudoku: SudokuGame):  # pylint: disable=redefined-outer-name
+    """
+    Test case for an unknown solver method of the `Sudoku` class.
+    """
+    with pytest.raises(ValueError):
+        SudokuGame(sudoku.grid.copy(), method="magic")  # type: ignore
+
+
+@pytest.mark.parametrize("heuristic", ["mrv", "mrv_degree"])
+def test_solve_heuristics(
+    sudoku: SudokuGame, heuristic: Heuristic
+):  # pylint: disable=redefined-outer-name
+    """
+    Test case for the cell selection heuristics of the "bitmask" method.
+
+    A 17 clues puzzle is solved and the example puzzle must have the same
+    solutions as with the row-major order.
+    """
+    minimal_sudoku = SudokuGame(
+        [
+            [0, 0, 0, 0, 0, 0, 0, 1, 0],
+            [4, 0, 0, 0, 0, 0, 0, 0, 0],
+            [0, 2, 0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 5, 0, 4, 0, 7],
+            [0, 0, 8, 0, 0, 0, 3, 0, 0],
+            [0, 0, 1, 0, 9, 0, 0, 0, 0],
+            [3, 0, 0, 4, 0, 0, 2, 0, 0],
+            [0, 5, 0, 1, 0, 0, 0, 0, 0],
+            [0, 0, 0, 8, 0, 6, 0, 0, 0],
+        ],
+        method="bitmask",
+        heuristic=heuristic,
+    )
+    minimal_sudoku.solve()
+    assert minimal_sudoku.results[0] == [
+        [6, 9, 3, 7, 8, 4, 5, 1, 2],
+        [4, 8, 7, 5, 1, 2, 9, 3, 6],
+        [1, 2, 5, 9, 6, 3, 8, 7, 4],
+        [9, 3, 2, 6, 5, 1, 4, 8, 7],
+        [5, 6, 8, 2, 4, 7, 3, 9, 1],
+        [7, 4, 1, 3, 9, 8, 6, 2, 5],
+        [3, 1, 9, 4, 7, 5, 2, 6, 8],
+        [8, 5, 6, 1, 2, 9, 7, 4, 3],
+        [2, 7, 4, 8, 3, 6, 1, 5, 9],
+    ]
+    assert len(minimal_sudoku.results) == 1
+
+    row_major_sudoku = SudokuGame(sudoku.grid.copy(), method="bitmask")
+    heuristic_sudoku = SudokuGame(
+        sudoku.grid.copy(), method="bitmask", heuristic=heuristic
+    )
+    row_major_sudoku.solve()
+    heuristic_sudoku.solve()
+    assert heuristic_sudoku.results == row_major_sudoku.results
+
+
+def test_heuristic_needs_bitmask(
+    sudoku: SudokuGame,
+):  # pylint: disable=redefined-outer-name
+    """
+    Test case for a heuristic used without the "bitmask" method.
+    """
+    with pytest.raises(ValueError):
+        SudokuGame(sudoku.grid.copy(), heuristic="mrv")
+
+
+def test_propagate():
+    """
+    Test case for the constraint propagation of `ConstraintMasks`.
+
+    An easy puzzle is solved by the logical rules alone, and undoing the
+    trail leaves the grid as it was.
+    """
+    sudoku = SudokuGame(  # pylint: disable=redefined-outer-name
+        [
+            [0, 0, 3, 0, 2, 0, 6, 0, 0],
+            [9, 0, 0, 3, 0, 5, 0, 0, 1],
+            [0, 0, 1, 8, 0, 6, 4, 0, 0],
+            [0, 0, 8, 1, 0, 2, 9, 0, 0],
+            [7, 0, 0, 0, 0, 0, 0, 0, 8],
+            [0, 0, 6, 7, 0, 8, 2, 0, 0],
+            [0, 0, 2, 6, 0, 9, 5, 0, 0],
+            [8, 0, 0, 2, 0, 3, 0, 0, 9],
+            [0, 0, 5, 0, 1, 0, 3, 0, 0],
+        ]
+    )
+    grid = sudoku.grid.copy()
+    masks = ConstraintMasks(grid)
+
+    assert masks.propagate()
+    assert not masks.empty_cells()
+    assert grid[0] == [4, 8, 3, 9, 2, 1, 6, 5, 7]
+    assert grid[8] == [6, 9, 5, 4, 1, 7, 3, 8, 2]
+
+    masks.undo(0)
+    assert grid == sudoku.grid
+
+
+def test_solve_propagate(sudoku: SudokuGame):  # pylint: disable=redefined-outer-name
+    """
+    Test case for the "bitmask" method with constraint propagation.
+    """
+    propagate_sudoku = SudokuGame(
+        sudoku.grid.copy(), method="bitmask", heuristic="mrv", propagate=True
+    )
+    row_major_sudoku = SudokuGame(sudoku.grid.copy(), method="bitmask")
+
+    propagate_sudoku.solve()
+    row_major_sudoku.solve()
+
+    assert propagate_sudoku.results == row_major_sudoku.results
+    assert propagate_sudoku.grid == sudoku.grid
+
+
+def test_solve_dlx(sudoku: SudokuGame):  # pylint: disable=redefined-outer-name
+    """
+    Test case for the "dlx" method of the `Sudoku` class.
+
+    The shared matrix must be restored after every search, so solving twice
+    gives the same solutions as the bitmask method.
+    """
+    bitmask_sudoku = SudokuGame(sudoku.grid.copy(), method="bitmask")
+    bitmask_sudoku.solve()
+
+    for _ in range(2):
+        dlx_sudoku = SudokuGame(sudoku.grid.copy(), method="dlx")
+        dlx_sudoku.solve()
+        assert dlx_sudoku.results == bitmask_sudoku.results
+
+
+def test_solve_dlx_clashing_givens():
+    """
+    Test case for the Dancing Links search with givens that break the Sudoku rules.
+    """
+    grid = [[0] * 9 for _ in range(9)]
+    grid[0][0] = grid[0][8] = 5
+    with dancing_links() as matrix:
+        assert not list(matrix.solutions(grid))
+        assert matrix.count(grid) == 0
+    with pytest.raises(ValueError):
+        SudokuGame(grid, method="dlx")
+
+
+def test_solve_dlx_interleaved(
+    sudoku: SudokuGame,  # pylint: disable=redefined-outer-name
+):
+    """
+    Test case for Dancing Links searches that run while another one is paused.
+    """
+    unique = SudokuGrid.from_line(
+        "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4.."
+    )
+    grid = sudoku.grid.copy()
+    grid[0, 6] = 0  # Has many solutions
+    paused = SudokuGame(grid, method="dlx").iter_solutions()
+    other = SudokuGame(grid, method="dlx").iter_solutions()
+    first = next(paused)
+
+    assert SudokuGame(unique, method="dlx").count_solutions(limit=2) == 1
+    assert next(other) == first
+    assert next(paused) == next(other)
+    paused.close()
+    other.close()
+    assert SudokuGame(unique, method="dlx").count_solutions(limit=2) == 1
+
+
+@pytest.mark.parametrize("method", ["backtracking", "bitmask", "dlx"])
+def test_solution_limits(
+    sudoku: SudokuGame, method: Method
+):  # pylint: disable=redefined-outer-name
+    """
+    Test case for the `max_solutions` of `solve` and the `count_solutions` limit.
+
+    Without the 7 of the first row the example puzzle has 386 solutions.
+    """
+    grid = sudoku.grid.copy()
+    grid[0, 6] = 0
+    many_sudoku = SudokuGame(grid.copy(), method=method)
+
+    assert len(many_sudoku.solve(max_solutions=2)) == 2
+    assert many_sudoku.results[0] != many_sudoku.results[1]
+    assert many_sudoku.count_solutions(limit=2) == 2
+    assert many_sudoku.grid == grid
+    if method == "dlx":
+        assert many_sudoku.count_solutions() == 386
+
+
+def test_iter_solutions(sudoku: SudokuGame):  # pylint: disable=redefined-outer-name
+    """
+    Test case for the lazy `iter_solutions` of the iterative bitmask search.
+
+    The search is paused between solutions, and closing it restores the grid.
+    """
+    grid = sudoku.grid.copy()
+    grid[0, 6] = 0
+    many_sudoku = SudokuGame(grid.copy(), method="bitmask", heuristic="mrv")
+
+    solutions = many_sudoku.iter_solutions()
+    first = next(solutions)
+    second = next(solutions)
+    assert many_sudoku.grid != grid
+    solutions.close()
+
+    assert many_sudoku.grid == grid
+    assert [first, second] == many_sudoku.solve(max_solutions=2)
+    assert sum(1 for _ in many_sudoku.iter_solutions()) == 386
+
+
+def test_flat_grid(sudoku: SudokuGame):  # pylint: disable=redefined-outer-name
+    """
+    Test case for `FlatSudokuGrid`, which must behave as `SudokuGrid`.
+    """
+    grid = sudoku.grid
+    flat_grid = FlatSudokuGrid(grid)
+
+    assert flat_grid == grid
+    assert str(flat_grid) == str(grid)
+    assert flat_grid[1] == grid[1]
+    assert flat_grid[1, 4] == grid[1, 4] == 3
+    assert flat_grid[-2, -5] == grid[-2, -5] == 7
+    assert flat_grid[-1] == grid[-1]
+    with pytest.raises(IndexError):
+        flat_grid[-10, 0]  # pylint: disable=pointless-statement
+    assert FlatSudokuGrid.from_line(grid.to_line()) == flat_grid
+    assert flat_grid.to_grid() == grid
+    for pos_y in range(9):
+        for pos_x in range(9):
+            for num in range(1, 10):
+                assert flat_grid.can_set_in(pos_y, pos_x, num) == grid.can_set_in(
+                    pos_y, pos_x, num
+                )
+
+    copy = flat_grid.copy()
+    copy[0, 0] = 6
+    assert copy[0, 0] == 6
+    assert flat_grid[0, 0] == 0
+    with pytest.raises(ValueError):
+        copy[0, 1] = 6
+    with pytest.raises(ValueError):
+        FlatSudokuGrid(bytes([5, 5] + [0] * 79))
+
+
+def test_box_sizes():
+    """
+    Test case for grids of other box sizes than the 3x3 boxes of a 9x9 grid.
+    """
+    # The empty 4x4 grid has 288 solutions
+    empty = [[0] * 4 for _ in range(4)]
+    for method in METHODS[1:]:
+        assert SudokuGame(empty, method=method).count_solutions() == 288
+    with pytest.raises(ValueError):
+        SudokuGrid([[0] * 5 for _ in range(5)])
+    with pytest.raises(ValueError):
+        SudokuGrid([[5, 0, 0, 0], *empty[1:]])
+
+    # A 16x16 grid with its numbers over 9 written as letters
+    grid = SudokuGrid.from_line(
+        "..1F...9...2DE....498CG2D...3B1F...2......1..6..D.A...1..6...CG2"
+        ".1.7.4......EA...4...G.D.A5.B..7C.2.EA5.B.F.64.8E.53.1F7..98CG.."
+        "....49.CG2.E.5.B.9.CG.DEA53.....G2D....B1.7649.CA53B.F7.4...G..E"
+        "F.64.8...D.A5.B1..CG2DE.53B.F.6.2D.A53B....4...G53.1.7....CG2DE."
+    )
+    assert grid.box_size == 4
+    assert grid[1, 6] == 16
+    assert str(grid).splitlines()[4] == (
+        "------------ + ------------- + ------------- + ------------"
+    )
+    assert SudokuGrid.from_string(str(grid), box_size=4) == grid
+    solutions = [
+        SudokuGame(grid, method="bitmask", heuristic="mrv", propagate=True).solve(1),
+        SudokuGame(grid, method="dlx").solve(1),
+    ]
+    for solution in solutions:
+        assert solution[0].box_size == 4
+        assert "." not in solution[0].to_line()
+        assert SudokuGrid(solution[0].data) == solution[0]
+
+
+def test_solver_stats():
+    """
+    Test case for the `stats` collected by the searches of every method.
+    """
+    grid = SudokuGrid.from_line(
+        "2...8.3...6..7..84.3.5..2.9...1.54.8.........4.27.6...3.1..7.4.72..4..6...4.1...3"
+    )
+    empty_cells = grid.to_line().count(".")
+    stats = {}
+
+    for method in METHODS:
+        game = SudokuGame(grid, method=method, collect_stats=True)
+        assert game.stats is None
+        game.solve()
+        assert game.stats is not None
+        stats[method] = game.stats
+    propagated = SudokuGame(grid, "bitmask", "mrv", propagate=True, collect_stats=True)
+    propagated.solve()
+
+    assert SudokuGame(grid, method="dlx").stats is None
+    # The same cells and numbers are tried in the same order
+    assert stats["backtracking"] == stats["bitmask"]
+    for method_stats in stats.values():
+        # Every cell is filled by the search, which backtracks from all of them
+        assert method_stats.max_depth == empty_cells
+        assert method_stats.nodes >= method_stats.backtracks > 0
+        assert method_stats.propagations == 0
+    assert propagated.stats is not None
+    assert propagated.stats.nodes == 0
+    assert propagated.stats.propagations >= empty_cells
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_search_budget(
+    sudoku: SudokuGame, method: Method
+):  # pylint: disable=redefined-outer-name
+    """
+    Test case for `solve` with a `SearchBudget`, which must stop the search,
+    restore the grid and tell why the puzzle is unsolved.
+    """
+    sudoku.method = method
+    initial_grid = sudoku.grid.copy()
+    token = CancellationToken()
+    token.cancel()
+
+    assert not sudoku.solve(budget=SearchBudget(max_nodes=50))
+    assert sudoku.status == SolveStatus.BUDGET_EXHAUSTED
+    assert sudoku.grid == initial_grid
+    assert not sudoku.solve(budget=SearchBudget(timeout=0))
+    assert sudoku.status == SolveStatus.TIMED_OUT
+    assert not sudoku.solve(budget=SearchBudget(token=token))
+    assert sudoku.status == SolveStatus.CANCELLED
+    with pytest.raises(SearchStopped):
+        sudoku.count_solutions(budget=SearchBudget(max_nodes=50))
+    assert sudoku.grid == initial_grid
+
+
+def test_search_budget_results():
+    """
+    Test case for the `status` of the searches that finish within their budget.
+    """
+    grid = SudokuGrid.from_line(
+        "2...8.3...6..7..84.3.5..2.9...1.54.8.........4.27.6...3.1..7.4.72..4..6...4.1...3"
+    )
+    sudoku = SudokuGame(grid, method="dlx", collect_stats=True)
+
+    assert sudoku.solve(budget=SearchBudget(max_nodes=1000, timeout=60))
+    assert sudoku.status == SolveStatus.SOLVED
+    assert sudoku.stats is not None
+    # A budget of exactly the nodes of the search is enough
+    assert sudoku.solve(budget=SearchBudget(max_nodes=sudoku.stats.nodes))
+    sudoku.grid.data[0][1] = 2  # Clashes with the 2 of the row
+    assert not sudoku.solve(budget=SearchBudget(max_nodes=1000))
+    assert sudoku.status == SolveStatus.NO_SOLUTION